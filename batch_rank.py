@@ -0,0 +1,202 @@
+"""
+Headless scrape-and-rank for large Zoho exports.
+
+    python batch_rank.py Accounts.csv -o output/ranked_accounts.xlsx --concurrency 50
+
+The export is read, enriched and scored one chunk of PREPROCESS_CHUNK_ROWS rows at
+a time; only the scored rows are kept for the final sort. Enrichment progress is
+checkpointed to <output>.checkpoint.jsonl every N companies; re-running the same
+command after a crash resumes from the last checkpoint.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+from utils.clean_company_data import (
+    PREPROCESS_CHUNK_ROWS, backfill_region, infer_numeric_columns, iter_preprocessed_chunks, to_records,
+)
+from utils.export import EXPORT_FORMATS, write_export, zoho_columns
+from utils.scoring import compute_scores
+from scraper.enrichment_pipeline import EnrichmentPipeline, enrich_rows
+from scraper.scraper_config import ASYNC_MAX_COMPANIES, ENRICH_STAGES
+
+# The UI's default as described there: point-based, one point for fewer than 100 employees
+DEFAULT_RANKING_CONFIG = {
+    "mode": "point",
+    "employee": True,
+    "region": False,
+    "funding": False,
+    "segment": False,
+    "threshold": 100,
+    "selected_region": None,
+    "selected_segment": None,
+    "selected_funding": None,
+}
+
+
+def file_fingerprint(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _json_default(o):
+    return o.item() if hasattr(o, "item") else str(o)
+
+
+def load_checkpoint(path, fingerprint, stages):
+    """Return ({row index: enriched row}, error log) saved for this input and stage list, if any."""
+    done, errors = {}, []
+    if not os.path.exists(path):
+        return done, errors
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("fingerprint") != fingerprint:
+            raise SystemExit(f"❌ {path} was written for a different input file; use --restart to discard it.")
+        if header.get("stages") != list(stages):
+            raise SystemExit(
+                f"❌ {path} was written with stages {header.get('stages')}, not {list(stages)}; "
+                "use --restart to discard it."
+            )
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break  # torn final write from a crash
+            if "row" in entry:
+                done[entry["index"]] = entry["row"]
+            if "error" in entry:   # checkpoints written before errors became a list
+                errors.append(entry["error"])
+            errors.extend(entry.get("errors", []))
+    return done, errors
+
+
+class CheckpointWriter:
+    def __init__(self, path, fingerprint, source, stages):
+        new = not os.path.exists(path)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.f = open(path, "a", encoding="utf-8")
+        if new:
+            self._write({"fingerprint": fingerprint, "source": source, "stages": list(stages)})
+            self.flush()
+
+    def _write(self, entry):
+        self.f.write(json.dumps(entry, default=_json_default) + "\n")
+
+    def add(self, index, row, errors=None):
+        entry = {"index": index, "row": row}
+        if errors:
+            entry["errors"] = errors
+        self._write(entry)
+
+    def flush(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+
+def write_output(df, path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    with open(path, "wb") as f:
+        write_export(df, ext if ext in EXPORT_FORMATS else "csv", f)
+
+
+def run(args):
+    ranking_config = DEFAULT_RANKING_CONFIG
+    if args.ranking_config:
+        with open(args.ranking_config, encoding="utf-8") as f:
+            ranking_config = json.load(f)
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint.jsonl"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    pipeline = EnrichmentPipeline(s.strip() for s in args.stages.split(","))
+    stages = [s.name for s in pipeline.stages]
+    fingerprint = file_fingerprint(args.input)
+    done, error_log = load_checkpoint(checkpoint_path, fingerprint, stages)
+    print(f"📄 {len(done)} accounts already enriched")
+
+    start = time.time()
+    scored, total, enriched_now = [], 0, 0
+    writer = CheckpointWriter(checkpoint_path, fingerprint, args.input, stages)
+    try:
+        for chunk in iter_preprocessed_chunks(args.input, PREPROCESS_CHUNK_ROWS):
+            # Row indices (and so checkpoint entries) count from the start of the file
+            base, rows = total, to_records(backfill_region(chunk))
+            total += len(rows)
+            del chunk
+            pending = [i for i in range(len(rows)) if base + i not in done]
+            for offset in range(0, len(pending), args.checkpoint_every):
+                batch = pending[offset:offset + args.checkpoint_every]
+                enriched, errors = enrich_rows([rows[i] for i in batch], max_concurrency=args.concurrency, pipeline=pipeline)
+                # One entry per failed stage, so a row can have several
+                errors_by_pos = {}
+                for e in errors:
+                    errors_by_pos.setdefault(e["Index"], []).append(e)
+                for pos, i in enumerate(batch):
+                    row_errors = [{**e, "Index": base + i} for e in errors_by_pos.get(pos, [])]
+                    error_log.extend(row_errors)
+                    rows[i] = enriched[pos]
+                    writer.add(base + i, enriched[pos], row_errors)
+                writer.flush()
+                enriched_now += len(batch)
+                print(f"💾 Checkpoint: {enriched_now} enriched, through row {base + batch[-1] + 1} ({int(time.time() - start)}s)")
+            for i in range(len(rows)):
+                if base + i in done:
+                    rows[i] = done.pop(base + i)
+            frame = pd.DataFrame(rows)
+            frame["Rank"] = compute_scores(frame, ranking_config)
+            scored.append(frame)
+    finally:
+        writer.close()
+    print(f"📄 {total} accounts, {enriched_now} enriched this run")
+    for name, t in pipeline.timings().items():
+        print(f"⏱️ {name}: {t['ran']} run, {t['skipped']} already filled, {t['failed']} failed, {t['seconds']}s total")
+
+    ranked = infer_numeric_columns(pd.concat(scored, ignore_index=True)) if scored else pd.DataFrame(columns=["Rank"])
+    del scored
+    ranked = ranked.sort_values("Rank", ascending=False)
+    if not args.keep_rank:
+        ranked = zoho_columns(ranked)
+    write_output(ranked, args.output)
+    print(f"✅ Wrote {len(ranked)} ranked accounts to {args.output}")
+
+    if error_log:
+        errors_path = os.path.splitext(args.output)[0] + "_errors.csv"
+        pd.DataFrame(error_log).to_csv(errors_path, index=False)
+        failed = len({e["Index"] for e in error_log})
+        print(f"⚠️ {failed} accounts failed to enrich ({len(error_log)} stage errors); see {errors_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enrich and rank a Zoho Accounts export without the Streamlit UI.")
+    parser.add_argument("input", help="Zoho export (CSV)")
+    parser.add_argument("-o", "--output", default="output/ranked_companies.csv", help=".csv, .xlsx or .parquet")
+    parser.add_argument("--concurrency", type=int, default=ASYNC_MAX_COMPANIES, help="companies scraped at once")
+    parser.add_argument("--stages", default=",".join(ENRICH_STAGES), help="enrichment stages to run (comma-separated)")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="companies per checkpoint")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint.jsonl)")
+    parser.add_argument("--restart", action="store_true", help="discard any existing checkpoint")
+    parser.add_argument("--ranking-config", help="JSON file in the same shape show_ranking_config returns")
+    parser.add_argument("--keep-rank", action="store_true", help="keep the Rank column in the output")
+    args = parser.parse_args()
+    if args.checkpoint_every < 1:
+        parser.error("--checkpoint-every must be at least 1")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
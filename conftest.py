@@ -0,0 +1 @@
+# Keeps the repository root importable (zoho_api, scraper, ...) when running plain `pytest`
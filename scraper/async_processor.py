@@ -0,0 +1,407 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Mapping, Optional, Tuple
+from urllib.parse import quote, urlparse, urlunparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+from yarl import URL
+
+from scraper.scraper_config import (
+    FAKE_CHROME_HEADERS, ACQUISITION_MAP, SKIP_DOMAINS,
+    ASYNC_TOTAL_CONNECTIONS, ASYNC_HOST_LIMIT, ASYNC_HOST_LIMITS,
+    RATE_LIMIT_RETRIES, HTTP_CACHE_ENABLED, VERIFY_CHUNK_BYTES,
+)
+from scraper.logging_config import logger
+from scraper.http_cache import CachedResponse, http_cache
+from scraper.browser_pool import browser_pool
+from scraper.rate_limiter import scheduler, THROTTLE_STATUSES
+from scraper.enrichment_cache import enrichment_cache, normalize_company_key, normalize_url_key
+from scraper.location_utils import assign_region
+from scraper.parse_pool import scan_page_async
+from scraper.bing_search import (
+    guess_possible_domains,
+    forced_site_queries,
+    score_bing_links,
+    extract_simple_tokens,
+    get_root_homepage,
+    VerifyScan,
+    scan_text,
+    SearchUnavailable,
+)
+
+
+@dataclass
+class AsyncResponse:
+    status: int
+    url: str
+    text: str
+    content: bytes
+    headers: Mapping[str, str]
+    encoding: str | None = None
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    @classmethod
+    def from_cache_entry(cls, entry: CachedResponse) -> "AsyncResponse":
+        return cls(entry.status, entry.final_url, entry.text, entry.body, entry.headers, entry.encoding, True)
+
+
+class AsyncHttpClient:
+    """
+    Thin wrapper over one aiohttp session that caps concurrent requests per host,
+    so hundreds of companies can be in flight without hammering any single site.
+    """
+
+    def __init__(self, host_limit: int = ASYNC_HOST_LIMIT, host_limits: dict | None = None):
+        self.host_limit = host_limit
+        self.host_limits = host_limits if host_limits is not None else ASYNC_HOST_LIMITS
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self._session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=ASYNC_TOTAL_CONNECTIONS, ttl_dns_cache=300)
+        # Same browser headers as the sync session, on every request this client makes
+        self._session = aiohttp.ClientSession(connector=connector, headers=FAKE_CHROME_HEADERS)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    def _slot(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.host_limits.get(host, self.host_limit))
+        return self._host_slots[host]
+
+    async def get(self, url: str, **kwargs) -> AsyncResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> AsyncResponse:
+        return await self.request("HEAD", url, **kwargs)
+
+    async def request(self, method: str, url: str, headers: dict | None = None, timeout: float = 5,
+                      allow_redirects: bool = True, encoded: bool = False) -> AsyncResponse:
+        async with self._slot(url):
+            async with self._session.request(
+                method,
+                URL(url, encoded=True) if encoded else url,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                allow_redirects=allow_redirects,
+            ) as r:
+                content = await r.read()
+                encoding = r.get_encoding() if content else None
+                text = content.decode(encoding, errors="replace") if content else ""
+                return AsyncResponse(r.status, str(r.url), text, content, r.headers.copy(), encoding)
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: dict | None = None, timeout: float = 5):
+        """GET whose body the caller reads (r.content.iter_chunked); leaving early closes the connection."""
+        async with self._slot(url):
+            async with self._session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                try:
+                    yield r
+                finally:
+                    if not r.content.at_eof():
+                        r.close()
+
+    async def get_cached(self, url: str, headers: dict | None = None, **kwargs) -> AsyncResponse:
+        """get() through the shared HTTP cache; same rules as http_client.cached_get."""
+        if not HTTP_CACHE_ENABLED:
+            return await self.get(url, headers=headers, **kwargs)
+        try:
+            entry = await asyncio.to_thread(http_cache.lookup, url)
+        except Exception as e:
+            logger.warning(f"[HttpCache] read failed for {url}: {e}")
+            entry = None
+        if entry and entry.fresh:
+            http_cache.count("fresh_hits")
+            return AsyncResponse.from_cache_entry(entry)
+
+        conditional = {**(headers or {}), **(entry.validators() if entry else {})}
+        r = await self.get(url, headers=conditional or None, **kwargs)
+        try:
+            if r.status == 304 and entry:
+                await asyncio.to_thread(http_cache.refresh, url, r.headers)
+                return AsyncResponse.from_cache_entry(entry)
+            http_cache.count("misses")
+            await asyncio.to_thread(http_cache.store, url, r.status, r.url, r.headers, r.encoding, r.content)
+        except Exception as e:
+            logger.warning(f"[HttpCache] write failed for {url}: {e}")
+        return r
+
+
+# --- async counterparts of scraper/bing_search.py ---
+
+async def fetch_page_with_playwright_async(url: str) -> str:
+    print(f"    🔍 [Playwright] fetching {url}")
+    return await browser_pool.fetch_async(url, timeout_ms=15_000)
+
+
+async def safe_get_html_async(client: AsyncHttpClient, url: str, use_playwright_on_403: bool = True) -> str | None:
+    try:
+        r = await client.get_cached(url, timeout=5)
+        if r.status == 403 and use_playwright_on_403:
+            print(f"    🚫 403 for {url}, retrying with Playwright…")
+            return await fetch_page_with_playwright_async(url)
+        elif r.ok:
+            return r.text
+    except aiohttp.ClientSSLError as ssl_err:
+        parsed = urlparse(url)
+        if not parsed.netloc.startswith("www."):
+            www_url = urlunparse(parsed._replace(netloc=f"www.{parsed.netloc}"))
+            print(f"    ⚠️ SSL error, retrying with www: {www_url}")
+            try:
+                r = await client.get_cached(www_url, timeout=5)
+                if r.ok:
+                    return r.text
+            except Exception as e2:
+                print(f"    ❌ retry w/ www failed: {e2}")
+        print(f"    ❌ SSL error for {url}: {ssl_err}")
+    except Exception as e:
+        print(f"    ❌ request error for {url}: {e}")
+    return None
+
+
+async def _scan_stream_async(r: aiohttp.ClientResponse, tokens, url: str) -> str | None:
+    scan = VerifyScan(tokens, r.charset, r.headers, keep=HTTP_CACHE_ENABLED and r.status == 200)
+    async for chunk in r.content.iter_chunked(VERIFY_CHUNK_BYTES):
+        if scan.feed(chunk):
+            return scan.found
+    found = scan.finish()
+    await asyncio.to_thread(scan.store, url, r.status, str(r.url), r.headers.copy(), r.charset)
+    return found
+
+
+async def page_has_tokens_async(client: AsyncHttpClient, url: str, tokens, use_playwright_on_403: bool = True) -> str | None:
+    """Async page_has_tokens: the first token found, "" if none, None if the page couldn't be fetched."""
+    entry = None
+    if HTTP_CACHE_ENABLED:
+        try:
+            entry = await asyncio.to_thread(http_cache.lookup, url)
+        except Exception as e:
+            logger.warning(f"[HttpCache] read failed for {url}: {e}")
+        if entry and entry.fresh:
+            http_cache.count("fresh_hits")
+            return scan_text(entry.text, tokens)
+
+    try:
+        async with client.stream(url, headers=entry.validators() if entry else None) as r:
+            if r.status == 304 and entry:
+                try:
+                    await asyncio.to_thread(http_cache.refresh, url, r.headers)
+                except Exception as e:
+                    logger.warning(f"[HttpCache] write failed for {url}: {e}")
+                return scan_text(entry.text, tokens)
+            if HTTP_CACHE_ENABLED:
+                http_cache.count("misses")
+            if r.status == 403 and use_playwright_on_403:
+                print(f"    🚫 403 for {url}, retrying with Playwright…")
+                return scan_text(await fetch_page_with_playwright_async(url), tokens)
+            if r.status < 400:
+                return await _scan_stream_async(r, tokens, url)
+    except aiohttp.ClientSSLError as ssl_err:
+        parsed = urlparse(url)
+        if not parsed.netloc.startswith("www."):
+            www_url = urlunparse(parsed._replace(netloc=f"www.{parsed.netloc}"))
+            print(f"    ⚠️ SSL error, retrying with www: {www_url}")
+            try:
+                async with client.stream(www_url) as r:
+                    if r.status < 400:
+                        return await _scan_stream_async(r, tokens, www_url)
+            except Exception as e2:
+                print(f"    ❌ retry w/ www failed: {e2}")
+        print(f"    ❌ SSL error for {url}: {ssl_err}")
+    except Exception as e:
+        print(f"    ❌ request error for {url}: {e}")
+    return None
+
+
+async def try_url_with_playwright_fallback_async(client: AsyncHttpClient, url: str, company_name: str) -> bool:
+    tokens = extract_simple_tokens(company_name)
+    return bool(tokens) and bool(await page_has_tokens_async(client, url, tokens))
+
+
+async def fetch_bing_results_async(client: AsyncHttpClient, query: str, timeout: int = 5):
+    url = f"https://www.bing.com/search?q={quote(query)}"
+    try:
+        print(f"  🔍 fetch_bing_results: {query}")
+        limiter = scheduler.limiter_for(url)
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            await limiter.acquire_async()
+            r = await client.get(url, timeout=timeout, encoded=True)
+            limiter.record(r.status, r.headers.get("Retry-After"))
+            if r.status not in THROTTLE_STATUSES:
+                break
+        if r.status == 429:
+            print("    🚫 Still rate‐limited by Bing after backing off")
+        if not r.ok:
+            raise aiohttp.ClientError(f"{r.status} Error for url: {url}")
+        return BeautifulSoup(r.content, "html.parser")
+    except Exception as e:
+        print(f"    ❌ fetch_bing_results error: {e}")
+        return None
+
+
+async def probe_url_async(client: AsyncHttpClient, url: str) -> bool:
+    try:
+        r = await client.head(url, timeout=5, allow_redirects=True)
+        if r.ok:
+            return True
+        if r.status in (404, 410):
+            return False
+    except aiohttp.ClientSSLError:
+        pass
+    except Exception:
+        return False
+    return bool(await safe_get_html_async(client, url))
+
+
+async def find_first_live_url_async(client: AsyncHttpClient, urls: list[str]) -> str | None:
+    tasks = [asyncio.create_task(probe_url_async(client, url)) for url in urls]
+    try:
+        for url, task in zip(urls, tasks):
+            if await task:
+                return url
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def get_bing_soup_async(client: AsyncHttpClient, company_name: str):
+    domains = guess_possible_domains(company_name)
+    print("  🔍 Trying direct domain guesses...")
+    test_url = await find_first_live_url_async(client, [f"https://{domain}" for domain in domains])
+    if test_url:
+        print(f"  ✅ Direct domain valid: {test_url}")
+        return BeautifulSoup(f'<a href="{test_url}">{test_url}</a>', "html.parser")
+
+    searched = False
+    for query in forced_site_queries(company_name, domains):
+        print(f"  🔍 Trying forced Bing query: '{query}'")
+        soup = await fetch_bing_results_async(client, query)
+        searched = searched or soup is not None
+        if soup and soup.select_one("li.b_algo"):
+            print(f"  ✅ Bing result found for forced query: {query}")
+            return soup
+
+    print(f"  🔍 Trying generic Bing search: '{company_name}'")
+    soup = await fetch_bing_results_async(client, company_name)
+    if soup is None and not searched:
+        raise SearchUnavailable(f"Bing search failed for '{company_name}'")
+    if soup:
+        result_blocks = soup.select("li.b_algo")
+        if result_blocks:
+            domains_seen = [urlparse(a.get("href", "")).netloc.lower() for a in soup.select("li.b_algo h2 a") if a and a.get("href")]
+            if all(any(skip in d for skip in SKIP_DOMAINS) for d in domains_seen):
+                print("    ⚠️ All generic results are from SKIP_DOMAINS → skipping soup.")
+                return None
+
+    if soup and soup.select_one("li.b_algo"):
+        print("  ✅ Generic Bing results accepted")
+        return soup
+
+    return None
+
+
+async def extract_and_score_links_async(client: AsyncHttpClient, soup: BeautifulSoup, company_name: str):
+    candidates = score_bing_links(soup, company_name)
+    if candidates:
+        return candidates
+
+    print("    ⚠️ Trying guessed domain fallback...")
+    fallback: list[tuple[int, str]] = []
+    for d in guess_possible_domains(company_name):
+        url = f"https://{d.strip()}"
+        if await try_url_with_playwright_fallback_async(client, url, company_name):
+            root = get_root_homepage(url)
+            fallback.append((0, root))
+            print(f"    ✅ fallback domain valid: {root}")
+    return fallback
+
+
+async def verify_website_fast_async(client: AsyncHttpClient, url: str, company_name: str, tried_www: bool = False) -> bool:
+    print(f"  🔍 verify_website_fast: GET {url}")
+    tokens = extract_simple_tokens(company_name)
+    if not tokens:
+        return False
+    found = await page_has_tokens_async(client, url, tokens)
+
+    if found is None and not tried_www:
+        parsed = urlparse(url)
+        alt_url = urlunparse(parsed._replace(netloc="www." + parsed.netloc))
+        print(f"    ❌ retrying with www: {alt_url}")
+        found = await page_has_tokens_async(client, alt_url, tokens)
+
+    if found:
+        print(f"    ✅ token match: '{found}'")
+        return True
+    if found is not None:
+        print("    ❌ no tokens found")
+    return False
+
+
+# --- async counterparts of scraper/company_processor.py ---
+
+async def resolve_redirected_url_async(client: AsyncHttpClient, url: str) -> str:
+    try:
+        r = await client.get(url, timeout=5, allow_redirects=True)
+        return r.url
+    except Exception:
+        return url
+
+
+@enrichment_cache.memoize("website", key=normalize_company_key)
+async def get_company_website_async(company_name: str, client: AsyncHttpClient) -> Optional[str]:
+    if company_name in ACQUISITION_MAP:
+        company_name = ACQUISITION_MAP[company_name]
+        logger.info(f"Mapped name to acquirer: {company_name}")
+
+    soup = await get_bing_soup_async(client, company_name)
+    if not soup:
+        return None
+
+    for score, link in await extract_and_score_links_async(client, soup, company_name):
+        url = link if link.startswith("http") else f"https://{link}"
+        url = await resolve_redirected_url_async(client, url)
+        if await verify_website_fast_async(client, url, company_name):
+            return url
+
+    return None
+
+
+@enrichment_cache.memoize(
+    "location",
+    key=normalize_url_key,
+    is_negative=lambda loc: loc[0] == "Not Found",
+    encode=list,
+    decode=tuple,
+)
+async def get_company_location_async(url: str, client: AsyncHttpClient) -> Tuple[str, str, str]:
+    async def fetch_html(target_url: str) -> Optional[str]:
+        html = await safe_get_html_async(client, target_url)
+        if not html:
+            html = await fetch_page_with_playwright_async(target_url)
+        return html or None
+
+    # Fetching stays on the event loop; parsing and scoring run in the parse pool
+    html = await fetch_html(url)
+    if not html:
+        return "Not Found", "Not Found", ""
+
+    contact_url, location = await scan_page_async(url, html, follow_contact=True)
+    if contact_url:
+        html = await fetch_html(contact_url)
+        if not html:
+            return "Not Found", "Not Found", ""
+        _, location = await scan_page_async(contact_url, html, follow_contact=False)
+
+    country, state, _ = location
+    region = assign_region(country, state)
+    return country or "Not Found", state or "Not Found", region or ""
@@ -0,0 +1,106 @@
+"""
+Benchmark for the domain-guess step of get_bing_soup.
+
+Serves fake company domains from a local server with a fixed per-request latency
+and compares the old one-by-one GET loop with find_first_live_url (concurrent,
+HEAD-first). Also reports how many forced site: Bing queries each name costs.
+
+    python -m scraper.bench_domain_probe [--latency 0.4] [--rounds 3]
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scraper.bing_search import (
+    guess_possible_domains,
+    find_first_live_url,
+    forced_site_queries,
+    safe_get_html,
+)
+
+COMPANIES = [
+    "Foo Biotherapeutics",
+    "Acme Therapeutics",
+    "Helix Biosciences",
+    "Nova Gene Therapeutics",
+]
+PAGE = b"<html><body>" + b"x" * 500_000 + b"</body></html>"
+
+
+class FakeSiteHandler(BaseHTTPRequestHandler):
+    latency = 0.4
+    live = set()
+
+    def _respond(self, with_body: bool):
+        time.sleep(self.latency)
+        domain = self.path.strip("/")
+        if domain in self.live:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            if with_body:
+                self.wfile.write(PAGE)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def do_GET(self):
+        self._respond(with_body=True)
+
+    def do_HEAD(self):
+        self._respond(with_body=False)
+
+    def log_message(self, *args):
+        pass
+
+
+def sequential_first_live_url(urls):
+    """The pre-change loop in get_bing_soup."""
+    for url in urls:
+        if safe_get_html(url):
+            return url
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.4, help="seconds per simulated request")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    FakeSiteHandler.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"{'company':<26}{'guesses':>8}{'sequential':>12}{'concurrent':>12}{'bing q':>10}")
+    totals = [0.0, 0.0]
+    for name in COMPANIES:
+        domains = guess_possible_domains(name)
+        # Worst realistic case: only the last guess resolves
+        FakeSiteHandler.live = {domains[-1]}
+        urls = [f"{base}/{d}" for d in domains]
+
+        timings = []
+        for probe in (sequential_first_live_url, find_first_live_url):
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                found = probe(urls)
+            timings.append((time.perf_counter() - start) / args.rounds)
+            assert found == urls[-1], (probe.__name__, found)
+
+        totals[0] += timings[0]
+        totals[1] += timings[1]
+        queries = f"{len(domains)}→{len(forced_site_queries(name, domains))}"
+        print(f"{name:<26}{len(domains):>8}{timings[0]:>11.2f}s{timings[1]:>11.2f}s{queries:>10}")
+
+    print(f"\nPer-company mean: {totals[0] / len(COMPANIES):.2f}s → {totals[1] / len(COMPANIES):.2f}s "
+          f"({totals[0] / max(totals[1], 1e-9):.1f}x faster)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Microbenchmark for the city-map / US-state stage of extract_location_from_text.
+
+Compares the old per-state regex loop with the precompiled match_known_location
+over the same snippets parse_contact_page would feed it (structured elements,
+footer and every body line), checks both give identical answers, and prints timings.
+
+    python -m scraper.bench_location_matching --pages saved_contact_pages/ [--rounds 5]
+
+Without --pages a small synthetic corpus of address-like lines is used.
+"""
+import argparse
+import contextlib
+import io
+import pathlib
+import random
+import re
+import time
+
+import us
+from bs4 import BeautifulSoup
+
+from scraper.location_utils import CITY_COUNTRY_MAP, match_known_location
+
+SELECTORS = [
+    '[class*="address"]', '[class*="contact"]', '[class*="location"]',
+    '[class*="headquarters"]', '[class*="office"]', '[id*="address"]',
+    '[id*="contact"]', '[id*="location"]'
+]
+
+
+def legacy_match_known_location(text):
+    """The loop extract_location_from_text used before the combined matcher."""
+    text_lower = text.lower()
+    for city, (country, state) in CITY_COUNTRY_MAP.items():
+        if re.search(rf"\b{re.escape(city)}\b", text_lower):
+            return country, state
+
+    for state in us.states.STATES:
+        if re.search(rf'\b{re.escape(state.name)}\b', text):
+            print(f"[MATCH] Regex full name match: {state.name}")
+            return "United States", state.name
+        if re.search(rf'\b{state.abbr}\b(?=\s+\d{{5}}|\s*,)', text):
+            print(f"[MATCH] Regex abbreviation + context match: {state.abbr} ({state.name})")
+            return "United States", state.name
+    return None
+
+
+def snippets_from_page(html):
+    soup = BeautifulSoup(html, "html.parser")
+    out = [el.get_text(" ", strip=True) for sel in SELECTORS for el in soup.select(sel)]
+    footer = soup.find("footer")
+    if footer:
+        out.append(footer.get_text(" ", strip=True))
+    out += [ln.strip() for ln in soup.get_text("\n").split("\n") if ln.strip()]
+    return [s for s in out if s]
+
+
+def synthetic_corpus(n=5000, seed=0):
+    rng = random.Random(seed)
+    states = list(us.states.STATES)
+    filler = ["Our team", "Privacy Policy", "Careers", "Cell therapy pipeline", "News & Events",
+              "© 2024 All rights reserved", "Headquartered in", "Contact us today", "Investors"]
+    lines = []
+    for _ in range(n):
+        st = rng.choice(states)
+        kind = rng.random()
+        if kind < 0.25:
+            lines.append(f"{rng.randint(1, 999)} Main Street, Suite {rng.randint(100, 900)}, Springfield, {st.abbr} {rng.randint(10000, 99999)}")
+        elif kind < 0.4:
+            lines.append(f"Headquartered in {st.name} with offices in West Virginia and Düsseldorf")
+        elif kind < 0.45:
+            lines.append("ul. Zwycięstwa 12, 44-100 Gliwice, Poland")
+        else:
+            lines.append(" ".join(rng.choice(filler) for _ in range(rng.randint(2, 12))))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", help="directory of saved .html contact/home pages")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.pages:
+        corpus = []
+        for path in sorted(pathlib.Path(args.pages).glob("*.htm*")):
+            corpus += snippets_from_page(path.read_text(errors="replace"))
+        source = f"{args.pages} ({len(corpus)} snippets)"
+    else:
+        corpus = synthetic_corpus()
+        source = f"synthetic ({len(corpus)} snippets)"
+
+    timings = {}
+    answers = {}
+    for fn in (legacy_match_known_location, match_known_location):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                answers[fn.__name__] = [fn(text) for text in corpus]
+            timings[fn.__name__] = (time.perf_counter() - start) / args.rounds
+
+    mismatches = sum(a != b for a, b in zip(answers["legacy_match_known_location"], answers["match_known_location"]))
+    old, new = timings["legacy_match_known_location"], timings["match_known_location"]
+    print(f"Corpus: {source}")
+    print(f"  per-state loop:    {old * 1000:8.1f} ms/pass")
+    print(f"  combined matcher:  {new * 1000:8.1f} ms/pass  ({old / new:.1f}x faster)")
+    print(f"  mismatched answers: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,28 @@
+import codecs
 import re
-import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from requests.exceptions import SSLError
 from urllib.parse import urlparse, urlunparse
 from bs4 import BeautifulSoup
-from scraper.scraper_config import FAKE_CHROME_HEADERS, SKIP_DOMAINS, BIOTECH_TERMS
+from scraper.scraper_config import (
+    SKIP_DOMAINS, BIOTECH_TERMS, DOMAIN_PROBE_WORKERS, SITE_QUERY_BATCH,
+    VERIFY_CHUNK_BYTES, VERIFY_MAX_BYTES, HTTP_CACHE_ENABLED,
+)
+from scraper.browser_pool import browser_pool
+from scraper import http_client
+from scraper.http_cache import freshness_lifetime, http_cache
+from scraper.logging_config import logger
+from scraper.rate_limiter import throttled_get
+
+
+class SearchUnavailable(RuntimeError):
+    """Every Bing request for a company failed, so "no website found" can't be concluded (or cached)."""
 
-session = requests.Session()
-session.headers.update(FAKE_CHROME_HEADERS)
 
 def safe_get_html(url: str, use_playwright_on_403: bool = True) -> str | None:
     try:
-        r = requests.get(url, timeout=5)
+        r = http_client.cached_get(url, timeout=5)
         if r.status_code == 403 and use_playwright_on_403:
             print(f"    🚫 403 for {url}, retrying with Playwright…")
             return fetch_page_with_playwright(url)
@@ -24,7 +35,7 @@ def safe_get_html(url: str, use_playwright_on_403: bool = True) -> str | None:
             www_url = urlunparse(parsed._replace(netloc=f"www.{parsed.netloc}"))
             print(f"    ⚠️ SSL error, retrying with www: {www_url}")
             try:
-                r = requests.get(www_url, timeout=5)
+                r = http_client.cached_get(www_url, timeout=5)
                 if r.ok:
                     return r.text
             except Exception as e2:
@@ -35,25 +46,167 @@ def safe_get_html(url: str, use_playwright_on_403: bool = True) -> str | None:
     return None
 
 def fetch_page_with_playwright(url: str) -> str:
-    from playwright.sync_api import sync_playwright
     print(f"    🔍 [Playwright] fetching {url}")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.set_extra_http_headers(FAKE_CHROME_HEADERS)
-        page.goto(url, timeout=15_000)
-        page.wait_for_timeout(2000)
-        html = page.content()
-        browser.close()
+    html = browser_pool.fetch(url, timeout_ms=15_000)
+    stats = browser_pool.stats()
+    print(f"    🔍 [Playwright] pool pages in use {stats['in_use']}/{stats['max_pages']} (peak {stats['peak_in_use']})")
     return html
 
+class TokenScanner:
+    """
+    Incremental "does any token appear in the lowercased page" over raw byte chunks.
+    The last len(longest token) - 1 characters are carried over, so a token split
+    across two chunks is still found.
+    """
+
+    def __init__(self, tokens, encoding: str | None = None):
+        self.tokens = sorted(tokens)
+        self.carry = max(map(len, self.tokens), default=1) - 1
+        try:
+            self.decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        except LookupError:
+            self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.tail = ""
+        self.bytes_read = 0
+
+    def feed(self, chunk: bytes, final: bool = False) -> str | None:
+        """Scan the next chunk; returns the first token found so far, if any."""
+        self.bytes_read += len(chunk)
+        return self.feed_text(self.decoder.decode(chunk, final))
+
+    def feed_text(self, text: str) -> str | None:
+        text = self.tail + text.lower()
+        for tok in self.tokens:
+            if tok in text:
+                return tok
+        self.tail = text[-self.carry:] if self.carry else ""
+        return None
+
+
+def scan_text(text: str | None, tokens) -> str | None:
+    """First token in an already fetched page, "" if none, None if there was no page."""
+    return (TokenScanner(tokens).feed_text(text) or "") if text else None
+
+
+class VerifyScan:
+    """
+    TokenScanner over a streamed response that also keeps the body for the HTTP
+    cache. A verified homepage is fetched again for location parsing, so after a
+    match reading goes on while the whole body still fits under the cache's
+    max_body_bytes; past that, or for a response the cache won't take, it stops.
+    """
+
+    def __init__(self, tokens, encoding: str | None, headers, keep: bool):
+        self.scanner = TokenScanner(tokens, encoding)
+        self.found = None
+        self.done = False
+        length = headers.get("Content-Length") or ""
+        keep = keep and freshness_lifetime(headers, http_cache.min_fresh) is not None
+        keep = keep and not (length.isdigit() and int(length) > http_cache.max_body_bytes)
+        self.chunks = [] if keep else None
+        self.size = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """Take the next chunk; True once the rest of the body isn't needed."""
+        if self.chunks is not None:
+            self.size += len(chunk)
+            if self.size > http_cache.max_body_bytes:
+                self.chunks = None
+            else:
+                self.chunks.append(chunk)
+        if self.found is None:
+            tok = self.scanner.feed(chunk)
+            if tok or self.scanner.bytes_read >= VERIFY_MAX_BYTES:
+                self.found = tok or ""
+        return self.found is not None and self.chunks is None
+
+    def finish(self) -> str | None:
+        """At end of body: the token, "" if none, None if the body was empty."""
+        self.done = True
+        if self.found is None:
+            tok = self.scanner.feed(b"", final=True)
+            self.found = tok or ("" if self.scanner.bytes_read else None)
+        return self.found
+
+    def store(self, url: str, status: int, final_url: str, headers, encoding: str | None):
+        """Cache the body if it was read to the end within the size limit."""
+        if not self.done or self.chunks is None:
+            return
+        body = b"".join(self.chunks)
+        try:
+            encoding = encoding or (requests.compat.chardet.detect(body)["encoding"] if body else None)
+            http_cache.store(url, status, final_url, headers, encoding, body)
+        except Exception as e:
+            logger.warning(f"[HttpCache] write failed for {url}: {e}")
+
+
+def _scan_stream(r: requests.Response, tokens, url: str) -> str | None:
+    """First token in a streamed body (see VerifyScan); a body read to the end is cached under `url`."""
+    scan = VerifyScan(tokens, requests.utils.get_encoding_from_headers(r.headers), r.headers,
+                      keep=HTTP_CACHE_ENABLED and r.status_code == 200)
+    for chunk in r.iter_content(VERIFY_CHUNK_BYTES):
+        if scan.feed(chunk):
+            return scan.found
+    found = scan.finish()
+    scan.store(url, r.status_code, r.url, r.headers, r.encoding)
+    return found
+
+
+def page_has_tokens(url: str, tokens, use_playwright_on_403: bool = True) -> str | None:
+    """
+    Stream a page and stop at the first of `tokens` (lowercase) it contains.
+    Returns the token, "" if the page was read (up to VERIFY_MAX_BYTES) without a
+    match, or None if it couldn't be fetched. Closing the response early drops the
+    connection instead of downloading the rest. Goes through the HTTP cache like
+    http_client.cached_get: a fresh copy is scanned without a request, a stale one
+    is revalidated and scanned on a 304, and a body read in full is stored. Same
+    403 and SSL fallbacks as safe_get_html.
+    """
+    entry = None
+    if HTTP_CACHE_ENABLED:
+        try:
+            entry = http_cache.lookup(url)
+        except Exception as e:
+            logger.warning(f"[HttpCache] read failed for {url}: {e}")
+        if entry and entry.fresh:
+            http_cache.count("fresh_hits")
+            return scan_text(entry.text, tokens)
+
+    try:
+        with http_client.get(url, timeout=5, stream=True, headers=entry.validators() if entry else None) as r:
+            if r.status_code == 304 and entry:
+                try:
+                    http_cache.refresh(url, r.headers)
+                except Exception as e:
+                    logger.warning(f"[HttpCache] write failed for {url}: {e}")
+                return scan_text(entry.text, tokens)
+            if HTTP_CACHE_ENABLED:
+                http_cache.count("misses")
+            if r.status_code == 403 and use_playwright_on_403:
+                print(f"    🚫 403 for {url}, retrying with Playwright…")
+                return scan_text(fetch_page_with_playwright(url), tokens)
+            if r.ok:
+                return _scan_stream(r, tokens, url)
+    except SSLError as ssl_err:
+        parsed = urlparse(url)
+        if not parsed.netloc.startswith("www."):
+            www_url = urlunparse(parsed._replace(netloc=f"www.{parsed.netloc}"))
+            print(f"    ⚠️ SSL error, retrying with www: {www_url}")
+            try:
+                with http_client.get(www_url, timeout=5, stream=True) as r:
+                    if r.ok:
+                        return _scan_stream(r, tokens, www_url)
+            except Exception as e2:
+                print(f"    ❌ retry w/ www failed: {e2}")
+        print(f"    ❌ SSL error for {url}: {ssl_err}")
+    except Exception as e:
+        print(f"    ❌ request error for {url}: {e}")
+    return None
+
+
 def try_url_with_playwright_fallback(url: str, company_name: str) -> bool:
-    content = safe_get_html(url)
-    if content:
-        for tok in extract_simple_tokens(company_name):
-            if tok in content.lower():
-                return True
-    return False
+    tokens = extract_simple_tokens(company_name)
+    return bool(tokens) and bool(page_has_tokens(url, tokens))
 
 def guess_possible_domains(name):
     name_clean = re.sub(r'[^a-zA-Z0-9\s-]', '', name)
@@ -81,37 +234,76 @@ def fetch_bing_results(query: str, timeout: int = 5):
     url = f"https://www.bing.com/search?q={requests.utils.quote(query)}"
     try:
         print(f"  🔍 fetch_bing_results: {query}")
-        r = session.get(url, timeout=timeout)
+        r = throttled_get(url, timeout=timeout)
         if r.status_code == 429:
-            print("    🚫 Rate‐limited by Bing; sleeping 10s…")
-            time.sleep(10)
-            r = session.get(url, timeout=timeout)
+            print("    🚫 Still rate‐limited by Bing after backing off")
         r.raise_for_status()
         return BeautifulSoup(r.content, "html.parser")
     except Exception as e:
         print(f"    ❌ fetch_bing_results error: {e}")
         return None
 
+def probe_url(url: str) -> bool:
+    """Cheap liveness check: HEAD first, full GET only when HEAD is refused or inconclusive."""
+    try:
+        r = http_client.head(url, timeout=5, allow_redirects=True)
+        if r.ok:
+            return True
+        if r.status_code in (404, 410):
+            return False
+    except SSLError:
+        pass  # safe_get_html knows how to retry with www.
+    except Exception:
+        return False
+    return bool(safe_get_html(url))
+
+def find_first_live_url(urls: list[str], max_workers: int = DOMAIN_PROBE_WORKERS) -> str | None:
+    """Probe all urls at once and return the first live one in list (priority) order."""
+    if not urls:
+        return None
+    ex = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)))
+    try:
+        futures = [ex.submit(probe_url, url) for url in urls]
+        for url, fut in zip(urls, futures):
+            if fut.result():
+                return url
+        return None
+    finally:
+        # Don't wait on lower-priority probes once we have an answer
+        ex.shutdown(wait=False, cancel_futures=True)
+
+def forced_site_queries(company_name: str, domains: list[str], batch_size: int = SITE_QUERY_BATCH) -> list[str]:
+    """Bing queries restricted to the guessed domains, several domains OR-ed per query."""
+    queries = []
+    for i in range(0, len(domains), batch_size):
+        chunk = domains[i:i + batch_size]
+        if len(chunk) == 1:
+            queries.append(f"{company_name} site:{chunk[0]}")
+        else:
+            queries.append(f"{company_name} (" + " OR ".join(f"site:{d}" for d in chunk) + ")")
+    return queries
+
 def get_bing_soup(company_name: str):
     domains = guess_possible_domains(company_name)
     print("  🔍 Trying direct domain guesses...")
-    for domain in domains:
-        test_url = f"https://{domain}"
-        content = safe_get_html(test_url)
-        if content:
-            print(f"  ✅ Direct domain valid: {test_url}")
-            return BeautifulSoup(f'<a href="{test_url}">{test_url}</a>', "html.parser")
-
-    for domain in domains:
-        query = f"{company_name} site:{domain}"
+    test_url = find_first_live_url([f"https://{domain}" for domain in domains])
+    if test_url:
+        print(f"  ✅ Direct domain valid: {test_url}")
+        return BeautifulSoup(f'<a href="{test_url}">{test_url}</a>', "html.parser")
+
+    searched = False
+    for query in forced_site_queries(company_name, domains):
         print(f"  🔍 Trying forced Bing query: '{query}'")
         soup = fetch_bing_results(query)
+        searched = searched or soup is not None
         if soup and soup.select_one("li.b_algo"):
-            print(f"  ✅ Bing result found for forced query: {domain}")
+            print(f"  ✅ Bing result found for forced query: {query}")
             return soup
 
     print(f"  🔍 Trying generic Bing search: '{company_name}'")
     soup = fetch_bing_results(company_name)
+    if soup is None and not searched:
+        raise SearchUnavailable(f"Bing search failed for '{company_name}'")
     if soup:
         result_blocks = soup.select("li.b_algo")
         if result_blocks:
@@ -131,6 +323,22 @@ def extract_simple_tokens(name):
     return {tok for tok in tokens if tok not in {"inc", "llc", "company", "corp", "co", "group"}}
 
 def extract_and_score_links(soup: BeautifulSoup, company_name: str):
+    candidates = score_bing_links(soup, company_name)
+    if candidates:
+        return candidates
+
+    print("    ⚠️ Trying guessed domain fallback...")
+    fallback: list[tuple[int, str]] = []
+    for d in guess_possible_domains(company_name):
+        url = f"https://{d.strip()}"
+        if try_url_with_playwright_fallback(url, company_name):
+            root = get_root_homepage(url)
+            fallback.append((0, root))
+            print(f"    ✅ fallback domain valid: {root}")
+    return fallback
+
+def score_bing_links(soup: BeautifulSoup, company_name: str) -> list[tuple[int, str]]:
+    """Score Bing result links for company_name without any network calls."""
     normalized = re.sub(r'[^a-z0-9]', '', company_name.lower())
     keywords = extract_simple_tokens(company_name)
     candidates: list[tuple[int, str]] = []
@@ -190,15 +398,7 @@ def extract_and_score_links(soup: BeautifulSoup, company_name: str):
 
     if not candidates:
         print("    ❌ extract_and_score_links: no good candidates found")
-        print("    ⚠️ Trying guessed domain fallback...")
-        fallback: list[tuple[int, str]] = []
-        for d in guess_possible_domains(company_name):
-            url = f"https://{d.strip()}"
-            if try_url_with_playwright_fallback(url, company_name):
-                root = get_root_homepage(url)
-                fallback.append((0, root))
-                print(f"    ✅ fallback domain valid: {root}")
-        return fallback
+        return []
 
     return sorted(candidates, key=lambda x: x[0], reverse=True)
 
@@ -208,22 +408,20 @@ def get_root_homepage(url: str) -> str:
 
 def verify_website_fast(url: str, company_name: str, tried_www: bool = False) -> bool:
     print(f"  🔍 verify_website_fast: GET {url}")
-    content = safe_get_html(url)
+    tokens = extract_simple_tokens(company_name)
+    if not tokens:
+        return False
+    found = page_has_tokens(url, tokens)
 
-    if not content and not tried_www:
+    if found is None and not tried_www:
         parsed = urlparse(url)
         alt_url = urlunparse(parsed._replace(netloc="www." + parsed.netloc))
         print(f"    ❌ retrying with www: {alt_url}")
-        content = safe_get_html(alt_url)
-
-    if not content:
-        return False
-
-    content = content.lower()
-    for tok in extract_simple_tokens(company_name):
-        if tok in content:
-            print(f"    ✅ token match: '{tok}'")
-            return True
+        found = page_has_tokens(alt_url, tokens)
 
-    print("    ❌ no tokens found")
+    if found:
+        print(f"    ✅ token match: '{found}'")
+        return True
+    if found is not None:
+        print("    ❌ no tokens found")
     return False
\ No newline at end of file
@@ -0,0 +1,196 @@
+import asyncio
+import atexit
+import itertools
+import threading
+
+from scraper.logging_config import logger
+from scraper.scraper_config import (
+    FAKE_CHROME_HEADERS,
+    BROWSER_MAX_PAGES, BROWSER_CONTEXTS, BROWSER_PAGES_PER_CONTEXT, BROWSER_READY_TIMEOUT_MS,
+)
+
+
+class BrowserPool:
+    """
+    One long-lived headless Chromium shared by every scraper thread.
+
+    Playwright objects must stay on the thread that created them, so the pool owns a
+    background thread running an asyncio loop with the async Playwright API. Callers on
+    any thread (e.g. the ThreadPoolExecutor workers in views/scrape_and_rank.py) submit
+    fetches to that loop; a semaphore bounds how many pages are open at once and pages
+    are spread over a few reusable browser contexts that get recycled after a while.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = BROWSER_MAX_PAGES,
+        contexts: int = BROWSER_CONTEXTS,
+        pages_per_context: int = BROWSER_PAGES_PER_CONTEXT,
+        ready_timeout_ms: int = BROWSER_READY_TIMEOUT_MS,
+    ):
+        self.max_pages = max_pages
+        self.num_contexts = contexts
+        self.pages_per_context = pages_per_context
+        self.ready_timeout_ms = ready_timeout_ms
+
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        # Only touched from the pool's own event loop
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._context_uses = []
+        self._context_active = []
+        self._next_context = itertools.cycle(range(contexts))
+        self._semaphore = None
+        self._launch_lock = None
+
+        self._stats = {"fetches": 0, "failures": 0, "launches": 0, "in_use": 0, "peak_in_use": 0, "waiting": 0}
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._semaphore = asyncio.Semaphore(self.max_pages)
+                self._launch_lock = asyncio.Lock()
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name="browser-pool", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+
+    async def _ensure_browser(self):
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            from playwright.async_api import async_playwright
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            logger.info("[BrowserPool] Launching Chromium")
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._contexts = [None] * self.num_contexts
+            self._context_uses = [0] * self.num_contexts
+            self._context_active = [0] * self.num_contexts
+            with self._stats_lock:
+                self._stats["launches"] += 1
+
+    async def _get_context(self):
+        await self._ensure_browser()
+        idx = next(self._next_context)
+        ctx = self._contexts[idx]
+        if ctx is not None and self._context_uses[idx] >= self.pages_per_context and not self._context_active[idx]:
+            # Recycle idle long-lived contexts so cookies/cache do not grow without bound
+            await ctx.close()
+            ctx = None
+        if ctx is None:
+            ctx = await self._browser.new_context(
+                user_agent=FAKE_CHROME_HEADERS["User-Agent"],
+                extra_http_headers={k: v for k, v in FAKE_CHROME_HEADERS.items() if k != "User-Agent"},
+            )
+            self._contexts[idx] = ctx
+            self._context_uses[idx] = 0
+        self._context_uses[idx] += 1
+        self._context_active[idx] += 1
+        return idx, ctx
+
+    def _track(self, key: str, delta: int):
+        with self._stats_lock:
+            self._stats[key] += delta
+            if key == "in_use":
+                self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+
+    async def _fetch(self, url: str, timeout_ms: int) -> str:
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        self._track("waiting", 1)
+        async with self._semaphore:
+            self._track("waiting", -1)
+            self._track("in_use", 1)
+            page = idx = None
+            try:
+                idx, ctx = await self._get_context()
+                page = await ctx.new_page()
+                await page.goto(url, timeout=timeout_ms, wait_until="domcontentloaded")
+                try:
+                    # Ready once the network goes quiet; slow trackers shouldn't hold the page open
+                    await page.wait_for_load_state("networkidle", timeout=self.ready_timeout_ms)
+                except PlaywrightTimeoutError:
+                    pass
+                html = await page.content()
+                self._track("fetches", 1)
+                return html
+            except Exception:
+                self._track("failures", 1)
+                raise
+            finally:
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+                if idx is not None and idx < len(self._context_active):
+                    self._context_active[idx] -= 1
+                self._track("in_use", -1)
+
+    def fetch(self, url: str, timeout_ms: int = 15_000) -> str:
+        """Render url in the shared browser and return its HTML. Safe to call from any thread."""
+        self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BrowserPool.fetch cannot be called from the pool's own thread")
+        future = asyncio.run_coroutine_threadsafe(self._fetch(url, timeout_ms), self._loop)
+        return future.result()
+
+    async def fetch_async(self, url: str, timeout_ms: int = 15_000) -> str:
+        """Awaitable fetch for callers running their own event loop."""
+        self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._fetch(url, timeout_ms), self._loop)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["max_pages"] = self.max_pages
+        stats["utilization"] = stats["in_use"] / self.max_pages
+        stats["peak_utilization"] = stats["peak_in_use"] / self.max_pages
+        return stats
+
+    async def _shutdown(self):
+        for ctx in self._contexts:
+            if ctx is not None:
+                try:
+                    await ctx.close()
+                except Exception:
+                    pass
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = self._playwright = None
+        self._contexts = []
+
+    def close(self):
+        with self._start_lock:
+            if self._loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=10)
+            except Exception as e:
+                logger.warning(f"[BrowserPool] Shutdown error: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = self._thread = None
+
+
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close)
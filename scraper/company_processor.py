@@ -3,23 +3,22 @@ from typing import Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
 from bs4 import BeautifulSoup
-import requests
 
-from scraper.scraper_config import FAKE_CHROME_HEADERS, ACQUISITION_MAP
+from scraper.scraper_config import ACQUISITION_MAP
+from scraper import http_client
 from scraper.logging_config import logger
 from scraper.location_utils import parse_contact_page, assign_region
+from scraper.page_analysis import PageAnalysis
+from scraper.enrichment_cache import enrichment_cache, normalize_company_key, normalize_url_key
 from scraper.bing_search import (
     get_bing_soup,
     extract_and_score_links,
     verify_website_fast,
     safe_get_html,
     fetch_page_with_playwright,
+    SearchUnavailable,
 )
 
-# Shared session
-session = requests.Session()
-session.headers.update(FAKE_CHROME_HEADERS)
-
 CONTACT_URL_PATTERNS = [
     "/contact", "/contact-us", "/contact_us", "/contacts",
     "/get-in-touch", "/reach-us", "/about/contact",
@@ -32,7 +31,7 @@ CONTACT_TEXT_PHRASES = [
 
 def resolve_redirected_url(url: str) -> str:
     try:
-        r = requests.get(url, headers=FAKE_CHROME_HEADERS, timeout=5, allow_redirects=True)
+        r = http_client.get(url, timeout=5, allow_redirects=True)
         return r.url
     except Exception:
         return url
@@ -61,7 +60,16 @@ def find_contact_link(soup: BeautifulSoup, base_url: str) -> Optional[str]:
     return None
 
 
+def fetch_page(url: str) -> Optional[PageAnalysis]:
+    """Fetch url once (falling back to Playwright) for parsing by the location strategies."""
+    html = safe_get_html(url)
+    if not html:
+        html = fetch_page_with_playwright(url)
+    return PageAnalysis(url, html) if html else None
+
+
 @lru_cache(maxsize=128)
+@enrichment_cache.memoize("website", key=normalize_company_key)
 def get_company_website(company_name: str) -> Optional[str]:
     if company_name in ACQUISITION_MAP:
         company_name = ACQUISITION_MAP[company_name]
@@ -80,34 +88,26 @@ def get_company_website(company_name: str) -> Optional[str]:
     return None
 
 
+@enrichment_cache.memoize(
+    "location",
+    key=normalize_url_key,
+    is_negative=lambda loc: loc[0] == "Not Found",
+    encode=list,
+    decode=tuple,
+)
 def get_company_location(url: str) -> Tuple[str, str, str]:
-    def get_soup_from_url(target_url: str) -> Optional[BeautifulSoup]:
-        html = safe_get_html(target_url)
-        if not html:
-            html = fetch_page_with_playwright(target_url)
-        return BeautifulSoup(html, "html.parser") if html else None
-
-    soup = get_soup_from_url(url)
-    if not soup:
+    page = fetch_page(url)
+    if not page:
         return "Not Found", "Not Found", ""
 
-    contact_url = find_contact_link(soup, url)
+    contact_url = find_contact_link(page.soup, url)
     if contact_url:
-        soup = get_soup_from_url(contact_url)
+        page = fetch_page(contact_url)
 
-    if not soup:
+    if not page:
         return "Not Found", "Not Found", ""
 
-    lines = [ln.strip() for ln in soup.get_text("\n").split("\n") if ln.strip()]
-    html = soup.encode(formatter="html").decode()
-    country, state = parse_contact_page(soup, html, lines)
-
-    if not country and contact_url:
-        soup2 = get_soup_from_url(contact_url)
-        if soup2:
-            lines2 = [ln.strip() for ln in soup2.get_text("\n").split("\n") if ln.strip()]
-            html2 = soup2.encode(formatter="html").decode()
-            country, state = parse_contact_page(soup2, html2, lines2)
+    country, state = parse_contact_page(page)
 
     region = assign_region(country, state)
     return country or "Not Found", state or "Not Found", region or ""
@@ -121,7 +121,10 @@ def process_company(
     url = country = state = region = None
 
     if scrape_website:
-        url = get_company_website(company_name)
+        try:
+            url = get_company_website(company_name)
+        except SearchUnavailable as e:
+            logger.warning(f"{e}; leaving the website blank")
 
     if scrape_location and url:
         country, state, region = get_company_location(url)
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from scraper.logging_config import logger
+from scraper.scraper_config import EMPLOYEE_RESOLVER_WORKERS
+
+
+@dataclass
+class EmployeeSource:
+    """
+    One way of finding a headcount. fn(company_name, cancelled) returns a count or
+    None and should check the `cancelled` event between requests; lower priority
+    values win, and a source still running after `timeout` seconds counts as a miss.
+    """
+    name: str
+    fn: Callable[[str, threading.Event], int | None]
+    priority: int
+    timeout: float
+
+
+class _SourceStats:
+    def __init__(self, window: int = 1000):
+        self.counts = {"calls": 0, "hits": 0, "misses": 0, "errors": 0, "timeouts": 0, "cancelled": 0, "wins": 0}
+        self.latencies = deque(maxlen=window)
+
+    def summary(self) -> dict:
+        lat = sorted(self.latencies)
+        pct = lambda p: round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000) if lat else None
+        mean = round(sum(lat) / len(lat) * 1000) if lat else None
+        return {**self.counts, "mean_ms": mean, "p50_ms": pct(0.5), "p95_ms": pct(0.95)}
+
+
+class EmployeeCountResolver:
+    """
+    Runs every source for a company at once and returns the value of the
+    highest-priority source that finds one. A lower-priority hit is held until every
+    source above it has missed or timed out, so the answer is the same as trying the
+    sources one by one; once it's decided, the remaining sources are cancelled.
+    """
+
+    def __init__(self, sources: Iterable[EmployeeSource], max_workers: int = EMPLOYEE_RESOLVER_WORKERS):
+        self.sources = sorted(sources, key=lambda s: s.priority)
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="employee-source")
+        self._lock = threading.Lock()
+        self._stats = {s.name: _SourceStats() for s in self.sources}
+
+    def _count(self, source: str, key: str):
+        with self._lock:
+            self._stats[source].counts[key] += 1
+
+    def _run(self, source: EmployeeSource, company_name: str, cancelled: threading.Event) -> int | None:
+        if cancelled.is_set():
+            self._count(source.name, "cancelled")
+            return None
+        self._count(source.name, "calls")
+        start = time.monotonic()
+        try:
+            value = source.fn(company_name, cancelled)
+        except Exception as e:
+            logger.warning(f"[Employees] {source.name} failed for '{company_name}': {e}")
+            self._count(source.name, "errors")
+            value = None
+        else:
+            if value is None and cancelled.is_set():
+                # Stopped early because another source already decided; not a real miss
+                self._count(source.name, "cancelled")
+                return None
+            self._count(source.name, "hits" if value is not None else "misses")
+        with self._lock:
+            self._stats[source.name].latencies.append(time.monotonic() - start)
+        return value
+
+    def resolve(self, company_name: str) -> tuple[int | None, str | None]:
+        """(employee count, name of the source it came from); (None, None) if no source found one."""
+        cancelled = threading.Event()
+        start = time.monotonic()
+        futures = {self._pool.submit(self._run, s, company_name, cancelled): s for s in self.sources}
+        deadlines = {s.name: start + s.timeout for s in self.sources}
+        results = {}
+        pending = set(futures)
+        try:
+            while True:
+                now = time.monotonic()
+                for source in self.sources:
+                    if source.name in results:
+                        if results[source.name] is not None:
+                            self._count(source.name, "wins")
+                            return results[source.name], source.name
+                        continue
+                    if now >= deadlines[source.name]:
+                        logger.info(f"[Employees] {source.name} timed out after {source.timeout}s for '{company_name}'")
+                        self._count(source.name, "timeouts")
+                        results[source.name] = None
+                        continue
+                    break  # the best source still in the running hasn't answered yet
+                else:
+                    return None, None
+
+                waiting_on = [f for f in pending if futures[f].name not in results]
+                next_deadline = min(deadlines[futures[f].name] for f in waiting_on)
+                done, pending = wait(pending, timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+                for f in done:
+                    results.setdefault(futures[f].name, f.result())
+        finally:
+            cancelled.set()
+            for f in pending:
+                f.cancel()
+
+    def resolve_many(self, company_names: list[str], max_companies: int | None = None) -> dict[str, int | None]:
+        # By default, as many companies as can have all their sources running at once
+        max_companies = max_companies or max(1, self.max_workers // max(1, len(self.sources)))
+        with ThreadPoolExecutor(max_workers=max_companies) as outer:
+            counts = outer.map(lambda name: self.resolve(name)[0], company_names)
+            return dict(zip(company_names, counts))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: st.summary() for name, st in self._stats.items()}
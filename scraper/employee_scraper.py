@@ -1,77 +1,124 @@
 import re
-import time
+import threading
 from collections import Counter
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
-from logging_config import logger
+from scraper.logging_config import logger
+from scraper import http_client
+from scraper.rate_limiter import throttled_get
+from scraper.employee_resolver import EmployeeCountResolver, EmployeeSource
+from scraper.enrichment_cache import enrichment_cache
+from scraper.scraper_config import EMPLOYEE_SOURCES, WIKIDATA_SPARQL_ENDPOINT, WIKIDATA_BATCH_SIZE
+
+_NOT_CACHED = object()
+# Statement preference when a label has several candidates: number of employees over
+# staff, preferred rank over normal, then the most recent point in time
+_WIKIDATA_PROPS = ("P1128", "P1120")
+_PREFERRED_RANK = "http://wikiba.se/ontology#PreferredRank"
+
+
+def _sparql_literal(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"@en'
+
+
+def wikidata_employees_query(names: list[str]) -> str:
+    """One SPARQL query returning every employee/staff statement for items labelled with any of `names`."""
+    values = " ".join(_sparql_literal(n) for n in names)
+    return f"""
+    SELECT ?label ?item ?prop ?amount ?rank ?asOf WHERE {{
+      VALUES ?label {{ {values} }}
+      ?item rdfs:label ?label ;
+            wdt:P31 [] .
+      OPTIONAL {{
+        VALUES (?prop ?p ?ps) {{ ("P1128" p:P1128 ps:P1128) ("P1120" p:P1120 ps:P1120) }}
+        ?item ?p ?st .
+        ?st ?ps ?amount ;
+            wikibase:rank ?rank .
+        FILTER(?rank != wikibase:DeprecatedRank)
+        OPTIONAL {{ ?st pq:P585 ?asOf }}
+      }}
+    }}
+    """
+
+
+def pick_wikidata_employee_counts(bindings: list[dict]) -> dict[str, int]:
+    """Best employee count per label from wikidata_employees_query results."""
+    best = {}
+    for b in bindings:
+        if "amount" not in b:
+            continue
+        label = b["label"]["value"]
+        try:
+            count = int(float(b["amount"]["value"].replace("+", "")))
+        except ValueError:
+            continue
+        qid = b["item"]["value"].rsplit("/", 1)[-1]
+        key = (
+            -_WIKIDATA_PROPS.index(b["prop"]["value"]),
+            b.get("rank", {}).get("value") == _PREFERRED_RANK,
+            b.get("asOf", {}).get("value", ""),
+            -int(qid.lstrip("Q") or 0),   # older (lower) QIDs are usually the notable entity
+        )
+        if label not in best or key > best[label][0]:
+            best[label] = (key, count)
+    return {label: count for label, (_, count) in best.items()}
 
 
 class MultiSourceEmployeeScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': (
-                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                'AppleWebKit/537.36 (KHTML, like Gecko) '
-                'Chrome/91.0.4472.124 Safari/537.36'
-            )
-        })
+    def __init__(self, sources: dict = EMPLOYEE_SOURCES):
+        self.session = http_client.session
+        fns = {
+            "wikidata": lambda name, cancelled: self.query_wikidata_employees(name),
+            "wikipedia": lambda name, cancelled: self.parse_wikipedia_infobox_employees(name),
+            "search": lambda name, cancelled: self.search_engine_employee_estimate(name, cancelled=cancelled),
+            "site": self.site_employee_count,
+        }
+        self.resolver = EmployeeCountResolver(
+            EmployeeSource(name, fns[name], cfg["priority"], cfg["timeout"]) for name, cfg in sources.items()
+        )
 
     def query_wikidata_employees(self, company_name: str) -> int | None:
         """
         Query Wikidata for employee count (P1128 / P1120).
         """
-        try:
-            sparql_endpoint = "https://query.wikidata.org/sparql"
-            query = f"""
-            SELECT ?item ?itemLabel WHERE {{
-              ?item rdfs:label "{company_name}"@en .
-              ?item wdt:P31 ?instance .
-              SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
-            }}
-            LIMIT 1
-            """
-            headers = {"Accept": "application/sparql-results+json"}
-            r = self.session.get(sparql_endpoint, params={"query": query}, headers=headers, timeout=10)
-
-            data = r.json()
-            if not data.get("results", {}).get("bindings"):
-                logger.info(f"[Wikidata] No Q‐item found for '{company_name}'.")
-                return None
-
-            qid = data["results"]["bindings"][0]["item"]["value"].split("/")[-1]
-            detail_url = f"https://www.wikidata.org/wiki/Special:EntityData/{qid}.json"
-            r2 = self.session.get(detail_url, timeout=10)
-            jd = r2.json()
+        return self.query_wikidata_employees_batch([company_name]).get(company_name)
 
-            if qid not in jd.get("entities", {}):
-                logger.info(f"[Wikidata] Entity data for QID={qid} missing.")
-                return None
-
-            statements = jd["entities"][qid].get("claims", {})
-            for prop in ("P1128", "P1120"):  # P1128 = number of employees, P1120 = staff
-                if prop in statements:
-                    for claim in statements[prop]:
-                        mainsnak = claim.get("mainsnak", {})
-                        if mainsnak.get("datatype") == "quantity" and "datavalue" in mainsnak:
-                            valobj = mainsnak["datavalue"]["value"]
-                            amount = valobj.get("amount")
-                            if amount:
-                                try:
-                                    count = int(float(amount.replace("+", "")))
-                                    logger.info(f"[Wikidata] Found {count} employees for '{company_name}'.")
-                                    return count
-                                except Exception:
-                                    logger.info(
-                                        f"[Wikidata] Unable to parse quantity '{amount}' for '{company_name}'."
-                                    )
-            logger.info(f"[Wikidata] No P1128/P1120 statement for '{company_name}'.")
-            return None
-
-        except Exception as e:
-            logger.warning(f"[Wikidata] Exception while querying '{company_name}': {e}")
-            return None
+    def query_wikidata_employees_batch(self, company_names: list[str]) -> dict[str, int | None]:
+        """
+        Employee counts for many companies, WIKIDATA_BATCH_SIZE labels per SPARQL query.
+        Answers (including misses) are kept in the enrichment cache.
+        """
+        results, todo = {}, []
+        for name in dict.fromkeys(n.strip() for n in company_names if n and n.strip()):
+            cached = enrichment_cache.get("wikidata_employees", name, _NOT_CACHED)
+            if cached is _NOT_CACHED:
+                todo.append(name)
+            else:
+                results[name] = cached
+
+        for i in range(0, len(todo), WIKIDATA_BATCH_SIZE):
+            batch = todo[i:i + WIKIDATA_BATCH_SIZE]
+            try:
+                r = self.session.post(
+                    WIKIDATA_SPARQL_ENDPOINT,
+                    data={"query": wikidata_employees_query(batch)},
+                    headers={"Accept": "application/sparql-results+json"},
+                    timeout=60,
+                )
+                r.raise_for_status()
+                counts = pick_wikidata_employee_counts(r.json().get("results", {}).get("bindings", []))
+            except Exception as e:
+                # Leave the batch uncached so it's retried next time
+                logger.warning(f"[Wikidata] Batch query for {len(batch)} companies failed: {e}")
+                results.update({name: None for name in batch})
+                continue
+            logger.info(f"[Wikidata] {len(counts)}/{len(batch)} companies have an employee count.")
+            for name in batch:
+                results[name] = counts.get(name)
+                enrichment_cache.set("wikidata_employees", name, results[name])
+
+        return {name: results.get(name.strip()) if name else None for name in company_names}
 
     def parse_wikipedia_infobox_employees(self, company_name: str) -> int | None:
         """
@@ -80,7 +127,7 @@ class MultiSourceEmployeeScraper:
         try:
             slug = company_name.strip().replace(" ", "_")
             url = f"https://en.wikipedia.org/wiki/{slug}"
-            r = self.session.get(url, timeout=10)
+            r = http_client.cached_get(url, timeout=10)
 
             if r.status_code == 404:
                 logger.info(f"[Wikipedia] Page not found: {url}")
@@ -125,7 +172,7 @@ class MultiSourceEmployeeScraper:
         Simple fetch with static requests; logs warnings on failure.
         """
         try:
-            response = self.session.get(url, timeout=10)
+            response = http_client.cached_get(url, timeout=10)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, "html.parser")
             return response.text, soup
@@ -144,7 +191,7 @@ class MultiSourceEmployeeScraper:
             query = f"{company_name} official website"
             search_url = "https://www.bing.com/search"
             params = {"q": query}
-            r = self.session.get(search_url, params=params, timeout=10)
+            r = throttled_get(search_url, params=params, timeout=10)
 
             if r.status_code != 200:
                 logger.info(f"[DomainSearch] Bing returned status {r.status_code} for '{company_name}'.")
@@ -275,7 +322,9 @@ class MultiSourceEmployeeScraper:
             logger.warning(f"[extract_from_address_tag] Exception: {e}")
             return None
 
-    def search_engine_employee_estimate(self, company_name: str, num_results: int = 5) -> int | None:
+    def search_engine_employee_estimate(
+        self, company_name: str, num_results: int = 5, cancelled: threading.Event | None = None,
+    ) -> int | None:
         """
         1) Try queries like '"Name" "number of employees"'
         2) Look in <li.b_algo> blocks for matching patterns
@@ -293,9 +342,12 @@ class MultiSourceEmployeeScraper:
             all_counts: list[int] = []
 
             for query in queries:
+                if cancelled is not None and cancelled.is_set():
+                    logger.info(f"[SearchEngine] Cancelled for '{company_name}'.")
+                    return None
                 logger.info(f"[SearchEngine] Trying query: {query}")
                 params = {"q": query, "count": num_results}
-                r = self.session.get(url, params=params, timeout=10)
+                r = throttled_get(url, params=params, timeout=10)
                 if r.status_code != 200:
                     logger.info(f"[SearchEngine] Bing returned {r.status_code} for '{query}'")
                     continue
@@ -330,8 +382,6 @@ class MultiSourceEmployeeScraper:
                             except ValueError:
                                 continue
 
-                time.sleep(1)
-
             if not all_counts:
                 logger.info(f"[SearchEngine] No valid employee count found.")
                 return None
@@ -345,7 +395,7 @@ class MultiSourceEmployeeScraper:
             logger.warning(f"[SearchEngine] Exception for '{company_name}': {e}")
             return None
 
-    def scrape_site_for_employees(self, company_domain: str) -> int | None:
+    def scrape_site_for_employees(self, company_domain: str, cancelled: threading.Event | None = None) -> int | None:
         """
         1) Look for team/leadership pages
         2) Then contact/about pages
@@ -369,6 +419,8 @@ class MultiSourceEmployeeScraper:
                     logger.info(f"[SiteScrape] Potential team link: {full_url}")
 
             for team_url in team_urls[:3]:
+                if cancelled is not None and cancelled.is_set():
+                    return None
                 count = self.extract_team_count(team_url)
                 if count and count > 1:
                     logger.info(f"[SiteScrape] Found {count} employees via '{team_url}'.")
@@ -378,6 +430,8 @@ class MultiSourceEmployeeScraper:
 
             # 2) Contact/about pages
             contact_url = self.find_contact_link(soup_home, homepage_url)
+            if cancelled is not None and cancelled.is_set():
+                return None
             if contact_url:
                 contact_html, soup_contact = self.fetch_html_with_fallback(contact_url)
                 if soup_contact:
@@ -414,49 +468,38 @@ class MultiSourceEmployeeScraper:
             logger.warning(f"[SiteScrape] Exception for domain '{company_domain}': {e}")
             return None
 
+    def site_employee_count(self, company_name: str, cancelled: threading.Event | None = None) -> int | None:
+        """Find the company's own domain via Bing and scrape it for a headcount."""
+        domain = self.find_verified_domain(company_name)
+        if not domain:
+            logger.info(f"[Main] Could not verify any domain for '{company_name}'.")
+            return None
+        if cancelled is not None and cancelled.is_set():
+            return None
+        logger.info(f"[Main] Using domain: {domain}")
+        site_val = self.scrape_site_for_employees(domain, cancelled=cancelled)
+        if site_val is None:
+            logger.info(f"[Main] No employee count found on site '{domain}'.")
+        return site_val
+
     def get_employee_count(self, company_name: str) -> int | None:
         """
-        1) Try Wikidata
-        2) Try Wikipedia infobox
-        3) Try search‐engine snippet patterns
-        4) Try direct site scraping
+        Wikidata, Wikipedia infobox, search-engine snippets and direct site scraping
+        all run at once; the first of them (in that order) to find a count wins.
         """
         logger.info(f"Starting employee‐count lookup for: '{company_name}'")
-
-        # Step 1: Wikidata
-        logger.info("→ Step 1: Trying Wikidata…")
-        wd_val = self.query_wikidata_employees(company_name)
-        if wd_val is not None:
-            logger.info(f"→ [Result] {company_name}: {wd_val} (via Wikidata)")
-            return wd_val
-
-        # Step 2: Wikipedia
-        logger.info("→ Step 2: Trying Wikipedia infobox…")
-        wiki_val = self.parse_wikipedia_infobox_employees(company_name)
-        if wiki_val is not None:
-            logger.info(f"→ [Result] {company_name}: {wiki_val} (via Wikipedia)")
-            return wiki_val
-
-        # Step 3: Search‐engine snippets
-        logger.info("→ Step 3: Trying search engine snippet extraction…")
-        se_val = self.search_engine_employee_estimate(company_name)
-        if se_val is not None:
-            logger.info(f"→ [Result] {company_name}: {se_val} (via search engine snippets)")
-            return se_val
-
-        # Step 4: Direct site scraping
-        logger.info("→ Step 4: Trying direct website scraping…")
-        domain = self.find_verified_domain(company_name)
-        if domain:
-            logger.info(f"[Main] Using domain: {domain}")
-            site_val = self.scrape_site_for_employees(domain)
-            if site_val is not None:
-                logger.info(f"→ [Result] {company_name}: {site_val} (via direct site scraping)")
-                return site_val
-            else:
-                logger.info(f"[Main] No employee count found on site '{domain}'.")
+        count, source = self.resolver.resolve(company_name)
+        if count is None:
+            logger.info(f"→ [Result] {company_name}: No employee count found in any source.")
         else:
-            logger.info(f"[Main] Could not verify any domain for '{company_name}'.")
+            logger.info(f"→ [Result] {company_name}: {count} (via {source})")
+        return count
 
-        logger.info(f"→ [Result] {company_name}: No employee count found in any source.")
-        return None
+    def get_employee_counts(self, company_names: list[str]) -> dict[str, int | None]:
+        # One batched Wikidata pass up front, so each company's wikidata source is a cache hit
+        self.query_wikidata_employees_batch(company_names)
+        return self.resolver.resolve_many(company_names)
+
+    def stats(self) -> dict:
+        """Per-source calls, hits, timeouts, wins and latency percentiles."""
+        return self.resolver.stats()
@@ -0,0 +1,217 @@
+import asyncio
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlparse
+
+from sqlalchemy import (
+    Boolean, Column, Float, MetaData, String, Table, Text,
+    create_engine, delete, event, func, insert, select, update,
+)
+
+from scraper.logging_config import logger
+from scraper.scraper_config import (
+    CACHE_PATH, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_NEGATIVE_TTL_SECONDS,
+)
+
+_MISSING = object()
+
+metadata = MetaData()
+cache_entries = Table(
+    "cache_entries", metadata,
+    Column("namespace", String(32), primary_key=True),
+    Column("key", String(512), primary_key=True),
+    Column("value", Text, nullable=False),
+    Column("negative", Boolean, nullable=False, default=False),
+    Column("created_at", Float, nullable=False),
+    Column("expires_at", Float, nullable=False),
+    Column("last_access", Float, nullable=False, index=True),
+)
+
+
+def normalize_company_key(name: str) -> str:
+    name = re.sub(r"[^a-z0-9\s]", " ", (name or "").lower())
+    return re.sub(r"\s+", " ", name).strip()
+
+
+def normalize_url_key(url: str) -> str:
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    netloc = parsed.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    return f"{netloc}{parsed.path.rstrip('/')}"
+
+
+class EnrichmentCache:
+    """
+    SQLite-backed cache for scrape results, shared across reruns and worker processes.
+    Entries expire after a TTL (shorter for negative results) and the least recently
+    used ones are evicted once the table grows past max_entries.
+    """
+
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: float = CACHE_TTL_SECONDS,
+        negative_ttl: float = CACHE_NEGATIVE_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._engine = None
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    @property
+    def engine(self):
+        with self._lock:
+            if self._engine is None:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                engine = create_engine(
+                    f"sqlite:///{self.path}",
+                    connect_args={"check_same_thread": False, "timeout": 30},
+                )
+
+                @event.listens_for(engine, "connect")
+                def _set_pragmas(dbapi_conn, _):
+                    cur = dbapi_conn.cursor()
+                    cur.execute("PRAGMA journal_mode=WAL")
+                    cur.execute("PRAGMA synchronous=NORMAL")
+                    cur.close()
+
+                metadata.create_all(engine)
+                self._engine = engine
+            return self._engine
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def get(self, namespace: str, key: str, default=_MISSING):
+        now = time.time()
+        where = (cache_entries.c.namespace == namespace) & (cache_entries.c.key == key)
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(cache_entries.c.value, cache_entries.c.negative, cache_entries.c.expires_at).where(where)
+            ).first()
+            if row is None:
+                self._count("misses")
+                return default
+            if row.expires_at <= now:
+                conn.execute(delete(cache_entries).where(where))
+                self._count("misses")
+                self._count("expired")
+                return default
+            conn.execute(update(cache_entries).where(where).values(last_access=now))
+
+        self._count("negative_hits" if row.negative else "hits")
+        return json.loads(row.value)
+
+    def set(self, namespace: str, key: str, value, negative: bool = False, ttl: float | None = None):
+        now = time.time()
+        negative = negative or value is None
+        if ttl is None:
+            ttl = self.negative_ttl if negative else self.ttl
+        row = {
+            "namespace": namespace, "key": key, "value": json.dumps(value), "negative": negative,
+            "created_at": now, "expires_at": now + ttl, "last_access": now,
+        }
+        where = (cache_entries.c.namespace == namespace) & (cache_entries.c.key == key)
+        with self.engine.begin() as conn:
+            conn.execute(delete(cache_entries).where(where))
+            conn.execute(insert(cache_entries).values(**row))
+            self._evict(conn, now)
+
+    def _evict(self, conn, now: float):
+        conn.execute(delete(cache_entries).where(cache_entries.c.expires_at <= now))
+        total = conn.execute(select(func.count()).select_from(cache_entries)).scalar_one()
+        excess = total - self.max_entries
+        if excess <= 0:
+            return
+        oldest = (
+            select(cache_entries.c.namespace, cache_entries.c.key)
+            .order_by(cache_entries.c.last_access)
+            .limit(excess)
+        )
+        for ns, k in conn.execute(oldest).all():
+            conn.execute(delete(cache_entries).where(
+                (cache_entries.c.namespace == ns) & (cache_entries.c.key == k)
+            ))
+        self._count("evictions", excess)
+        logger.debug(f"[Cache] Evicted {excess} least recently used entries")
+
+    def clear(self, namespace: str | None = None):
+        stmt = delete(cache_entries)
+        if namespace is not None:
+            stmt = stmt.where(cache_entries.c.namespace == namespace)
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def stats(self) -> dict:
+        with self.engine.connect() as conn:
+            entries = conn.execute(select(func.count()).select_from(cache_entries)).scalar_one()
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["negative_hits"] + counters["misses"]
+        counters["entries"] = entries
+        counters["hit_rate"] = (counters["hits"] + counters["negative_hits"]) / lookups if lookups else 0.0
+        return counters
+
+    def memoize(self, namespace: str, key=lambda x: x, is_negative=lambda v: v is None,
+                encode=lambda v: v, decode=lambda v: v):
+        """
+        Cache a single-key function (sync or async). Exceptions are not cached; results for which
+        is_negative() is true are stored with the shorter negative TTL.
+        """
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @wraps(fn)
+                async def async_wrapper(arg, *args, **kwargs):
+                    cache_key = key(arg)
+                    try:
+                        cached = await asyncio.to_thread(self.get, namespace, cache_key)
+                    except Exception as e:
+                        logger.warning(f"[Cache] read failed for {namespace}:{cache_key}: {e}")
+                        cached = _MISSING
+                    if cached is not _MISSING:
+                        return decode(cached)
+
+                    result = await fn(arg, *args, **kwargs)
+                    try:
+                        await asyncio.to_thread(
+                            self.set, namespace, cache_key, encode(result), negative=is_negative(result)
+                        )
+                    except Exception as e:
+                        logger.warning(f"[Cache] write failed for {namespace}:{cache_key}: {e}")
+                    return result
+                return async_wrapper
+
+            @wraps(fn)
+            def wrapper(arg, *args, **kwargs):
+                cache_key = key(arg)
+                try:
+                    cached = self.get(namespace, cache_key)
+                except Exception as e:
+                    logger.warning(f"[Cache] read failed for {namespace}:{cache_key}: {e}")
+                    cached = _MISSING
+                if cached is not _MISSING:
+                    return decode(cached)
+
+                result = fn(arg, *args, **kwargs)
+                try:
+                    self.set(namespace, cache_key, encode(result), negative=is_negative(result))
+                except Exception as e:
+                    logger.warning(f"[Cache] write failed for {namespace}:{cache_key}: {e}")
+                return result
+            return wrapper
+        return decorator
+
+
+enrichment_cache = EnrichmentCache()
@@ -0,0 +1,241 @@
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable
+
+from scraper.async_processor import AsyncHttpClient, get_company_location_async, get_company_website_async
+from scraper.logging_config import logger
+from scraper.scraper_config import ASYNC_MAX_COMPANIES, EMPLOYEE_STAGE_CONCURRENCY, ENRICH_STAGES
+
+
+def _missing(value) -> bool:
+    return value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+
+
+@dataclass(frozen=True)
+class EnricherStage:
+    """
+    One enrichment step. run(row, client) gets the row with every earlier stage's
+    output merged in and returns {column: value} for its `outputs`. The stage is
+    skipped when the row already has all of its outputs, or when one of its
+    `inputs` is still missing after the stages that produce it have finished.
+    `concurrency` caps how many rows run this stage at once; `prefetch(rows)`
+    is called once, off the event loop, with the rows that need the stage.
+    """
+    name: str
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+    run: Callable[[dict, AsyncHttpClient], Awaitable[dict]]
+    concurrency: int | None = None
+    prefetch: Callable[[list[dict]], None] | None = None
+
+    def needed(self, row: dict) -> bool:
+        return any(_missing(row.get(col)) for col in self.outputs)
+
+
+async def _website_stage(row, client):
+    return {"Website": await get_company_website_async(row["Account Name"], client)}
+
+
+async def _location_stage(row, client):
+    country, state, region = await get_company_location_async(row["Website"], client)
+    return {"Region": region}
+
+
+_employee_scraper = None
+_employee_scraper_lock = threading.Lock()
+
+
+def employee_scraper():
+    """Shared MultiSourceEmployeeScraper; built on first use since it starts a thread pool."""
+    global _employee_scraper
+    with _employee_scraper_lock:
+        if _employee_scraper is None:
+            from scraper.employee_scraper import MultiSourceEmployeeScraper
+            _employee_scraper = MultiSourceEmployeeScraper()
+        return _employee_scraper
+
+
+async def _employees_stage(row, client):
+    # The resolver is thread-based and runs its own sources concurrently
+    return {"Employees": await asyncio.to_thread(employee_scraper().get_employee_count, row["Account Name"])}
+
+
+def _prefetch_employees(rows):
+    # One batched Wikidata query instead of one per company
+    employee_scraper().query_wikidata_employees_batch([r["Account Name"] for r in rows if r.get("Account Name")])
+
+
+STAGES = {
+    "website": EnricherStage("website", ("Account Name",), ("Website",), _website_stage),
+    "location": EnricherStage("location", ("Website",), ("Region",), _location_stage),
+    "employees": EnricherStage(
+        "employees", ("Account Name",), ("Employees",), _employees_stage,
+        concurrency=EMPLOYEE_STAGE_CONCURRENCY, prefetch=_prefetch_employees,
+    ),
+}
+
+
+class _StageTimings:
+    def __init__(self):
+        self.counts = {"ran": 0, "skipped": 0, "no_input": 0, "failed": 0}
+        self.seconds = 0.0
+
+    def summary(self) -> dict:
+        ran = self.counts["ran"]
+        return {**self.counts, "seconds": round(self.seconds, 2), "mean_ms": round(self.seconds / ran * 1000) if ran else None}
+
+
+class EnrichmentPipeline:
+    """
+    Runs a set of stages over each row. A stage starts as soon as the stages that
+    produce its inputs are done, so independent stages (e.g. website lookup and
+    employee count) run side by side. Stages must be listed after the stages
+    whose outputs they consume.
+    """
+
+    def __init__(self, stages: Iterable[EnricherStage | str] = ENRICH_STAGES):
+        self.stages = [STAGES[s] if isinstance(s, str) else s for s in stages]
+        produced = set()
+        for stage in self.stages:
+            later = [c for c in stage.inputs if c not in produced and any(c in s.outputs for s in self.stages)]
+            if later:
+                raise ValueError(f"Stage '{stage.name}' needs {later} from a stage listed after it")
+            produced.update(stage.outputs)
+        self._timings = {s.name: _StageTimings() for s in self.stages}
+        self._slots: dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def outputs(self) -> list[str]:
+        return [col for s in self.stages for col in s.outputs]
+
+    def needed(self, row: dict) -> bool:
+        return any(s.needed(row) for s in self.stages)
+
+    def timings(self) -> dict:
+        return {name: t.summary() for name, t in self._timings.items()}
+
+    def count_skipped(self, n: int):
+        """Record n rows that needed no stage at all (and so never reached run) as skipped by every stage."""
+        for t in self._timings.values():
+            t.counts["skipped"] += n
+
+    def prefetch(self, rows: list[dict]):
+        for stage in self.stages:
+            if stage.prefetch:
+                todo = [r for r in rows if stage.needed(r)]
+                if todo:
+                    stage.prefetch(todo)
+
+    async def _run_stage(self, stage, row, updates, waits_on, client):
+        for task in waits_on:
+            await asyncio.wait([task])
+        current = {**row, **updates}
+        if any(_missing(current.get(col)) for col in stage.inputs):
+            self._timings[stage.name].counts["no_input"] += 1
+            return
+        async with self._slots.get(stage.name) or nullcontext():
+            start = time.monotonic()
+            try:
+                out = await stage.run(current, client)
+            except Exception:
+                self._timings[stage.name].counts["failed"] += 1
+                raise
+            finally:
+                self._timings[stage.name].seconds += time.monotonic() - start
+        self._timings[stage.name].counts["ran"] += 1
+        updates.update({col: out.get(col) for col in stage.outputs})
+
+    async def enrich(self, row: dict, client: AsyncHttpClient) -> tuple[dict, list[tuple[str, Exception]]]:
+        """
+        Returns (row with the stage outputs filled in, [(stage name, error)]).
+        A failed stage leaves its columns as they were; stages that depend on it
+        then see their inputs missing and are skipped.
+        """
+        updates, tasks = {}, {}
+        for stage in self.stages:
+            if not stage.needed(row):
+                self._timings[stage.name].counts["skipped"] += 1
+                continue
+            waits_on = [tasks[s.name] for s in self.stages if s.name in tasks and set(s.outputs) & set(stage.inputs)]
+            tasks[stage.name] = asyncio.create_task(self._run_stage(stage, row, updates, waits_on, client))
+
+        errors = []
+        for name, result in zip(tasks, await asyncio.gather(*tasks.values(), return_exceptions=True)):
+            if isinstance(result, Exception):
+                errors.append((name, result))
+        return {**row, **updates}, errors
+
+    async def _enrich_all(self, rows, on_done, max_concurrency):
+        self._slots = {s.name: asyncio.Semaphore(s.concurrency) for s in self.stages if s.concurrency}
+        row_slots = asyncio.Semaphore(max_concurrency)
+
+        async def run(i):
+            async with row_slots:
+                return i, await self.enrich(rows[i], client)
+
+        async with AsyncHttpClient() as client:
+            tasks = [asyncio.create_task(run(i)) for i in range(len(rows))]
+            for done, fut in enumerate(asyncio.as_completed(tasks), start=1):
+                i, result = await fut
+                on_done(i, result, done)
+
+    def run(
+        self,
+        rows: list[dict],
+        on_done: Callable[[int, tuple[dict, list], int], None],
+        max_concurrency: int = ASYNC_MAX_COMPANIES,
+    ):
+        """
+        Enrich every row; on_done(row_index, (row, errors), completed_count) is
+        called on the caller's thread as rows finish.
+        """
+        self.prefetch(rows)
+        coro = self._enrich_all(rows, on_done, max_concurrency)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Already inside an event loop (e.g. a notebook): run on a separate thread
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            return ex.submit(asyncio.run, coro).result()
+
+
+def enrich_rows(
+    rows: list[dict],
+    on_progress: Callable[[int, int], None] | None = None,
+    max_concurrency: int = ASYNC_MAX_COMPANIES,
+    pipeline: EnrichmentPipeline | None = None,
+) -> tuple[list[dict], list[dict]]:
+    """
+    Fill in the pipeline's output columns (by default Website, Region and Employees)
+    for Zoho account rows that are missing any of them. Returns (enriched rows in
+    input order, error log with one entry per failed stage). Rows that already have
+    everything pass through untouched; on_progress(completed, total) fires as rows finish.
+    """
+    pipeline = pipeline or EnrichmentPipeline()
+    results, error_log = list(rows), []
+
+    job_rows = [i for i, row_dict in enumerate(rows) if pipeline.needed(row_dict)]
+    skipped = len(rows) - len(job_rows)
+    pipeline.count_skipped(skipped)
+    if on_progress and skipped:
+        on_progress(skipped, len(rows))
+
+    def _on_done(job_idx, result, done):
+        i = job_rows[job_idx]
+        results[i], errors = result
+        for stage, e in errors:
+            error_log.append({"Index": i, "Company": rows[i].get("Account Name"), "Stage": stage, "Error": str(e)})
+        if on_progress:
+            on_progress(skipped + done, len(rows))
+
+    if job_rows:
+        pipeline.run([rows[i] for i in job_rows], on_done=_on_done, max_concurrency=max_concurrency)
+        for name, t in pipeline.timings().items():
+            logger.info(f"[Enrich] {name}: {t}")
+    return results, error_log
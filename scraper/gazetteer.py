@@ -0,0 +1,333 @@
+"""
+Offline place lookup used as the last resort in extract_location_from_text.
+
+The table is compiled from data that ships with the installed packages (GeoNames
+cities15000 via geotext, pycountry subdivisions, `us` state names) plus US ZIP3
+and Canadian postal prefixes, and written to GAZETTEER_PATH as:
+
+    <path>.npy   uint64[2, n]: row 0 is sorted name hashes, row 1 the packed
+                 (outcome index, kind, population) for each. Besides plain place
+                 names, keys include "zip3:<digits>", "fsa:<letter>", "usps:<abbr>"
+                 and "us:<city>" (the most populous US city of that name, for
+                 names whose best match is elsewhere, e.g. Cambridge)
+    <path>.json  {"version": ..., "outcomes": [[country, state], ...]}
+
+The .npy is memory-mapped, so parse-pool workers share one copy. Rebuild with
+`python -m scraper.gazetteer`.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+from scraper.logging_config import logger
+from scraper.scraper_config import GAZETTEER_PATH
+
+GAZETTEER_VERSION = 2
+
+# Entry kinds, in the order they're preferred when one text has several hits
+REGION, CITY = 0, 1
+MIN_NAME_LENGTH = 4   # shorter single-word names ("Bar", "Ely") match too much ordinary text
+MAX_NAME_WORDS = 4
+
+# USPS ZIP3 ranges (first three digits) for the states and DC; territories and military left out
+US_ZIP3_RANGES = [
+    (10, 27, "MA"), (28, 29, "RI"), (30, 38, "NH"), (39, 49, "ME"), (50, 54, "VT"), (55, 55, "MA"),
+    (56, 59, "VT"), (60, 69, "CT"), (70, 89, "NJ"), (100, 149, "NY"), (5, 5, "NY"), (150, 196, "PA"),
+    (197, 199, "DE"), (200, 200, "DC"), (201, 201, "VA"), (202, 205, "DC"), (206, 219, "MD"),
+    (220, 246, "VA"), (247, 268, "WV"), (270, 289, "NC"), (290, 299, "SC"), (300, 319, "GA"),
+    (320, 339, "FL"), (341, 349, "FL"), (350, 369, "AL"), (370, 385, "TN"), (386, 397, "MS"),
+    (398, 399, "GA"), (400, 427, "KY"), (430, 459, "OH"), (460, 479, "IN"), (480, 499, "MI"),
+    (500, 528, "IA"), (530, 549, "WI"), (550, 567, "MN"), (569, 569, "DC"), (570, 577, "SD"),
+    (580, 588, "ND"), (590, 599, "MT"), (600, 629, "IL"), (630, 658, "MO"), (660, 679, "KS"),
+    (680, 693, "NE"), (700, 715, "LA"), (716, 729, "AR"), (730, 731, "OK"), (733, 733, "TX"),
+    (734, 749, "OK"), (750, 799, "TX"), (800, 816, "CO"), (820, 831, "WY"), (832, 838, "ID"),
+    (840, 847, "UT"), (850, 865, "AZ"), (870, 884, "NM"), (885, 885, "TX"), (889, 898, "NV"),
+    (900, 961, "CA"), (967, 968, "HI"), (970, 979, "OR"), (980, 994, "WA"), (995, 999, "AK"),
+]
+
+# First letter of a Canadian postal code (FSA) -> province; X is split between NT and NU
+CA_FSA_PROVINCES = {
+    "A": "Newfoundland and Labrador", "B": "Nova Scotia", "C": "Prince Edward Island",
+    "E": "New Brunswick", "G": "Quebec", "H": "Quebec", "J": "Quebec", "K": "Ontario",
+    "L": "Ontario", "M": "Ontario", "N": "Ontario", "P": "Ontario", "R": "Manitoba",
+    "S": "Saskatchewan", "T": "Alberta", "V": "British Columbia", "Y": "Yukon",
+}
+
+CA_POSTAL = re.compile(r"\b([ABCEGHJ-NPRSTVXY])\d[A-Z] ?\d[A-Z]\d\b")
+US_ZIP = re.compile(r"\b(\d{3})\d{2}(-\d{4})?\b")
+# A state abbreviation or ZIP right after a city: "Cambridge, MA 02139", "Austin TX"
+US_STATE_AFTER = re.compile(r"\s*,?\s*(?:([A-Z]{2})\b|(\d{3})\d{2}\b)")
+# Words that introduce a place in running text ("based in Mobile")
+ADDRESS_CUES = {"in", "based", "headquartered", "located", "headquarters", "hq"}
+_WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+
+def normalize_place(text: str) -> str:
+    """Lowercase, accents stripped, words joined by single spaces ("Aix-en-Provence" -> "aix en provence")."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_WORD.findall(text.casefold()))
+
+
+def place_key(name: str) -> int:
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little")
+
+
+def _pack(outcome: int, kind: int, population: int) -> int:
+    return (outcome << 36) | (kind << 32) | min(population, 0xFFFFFFFF)
+
+
+def _us_state_names():
+    import us
+    return {s.abbr: s.name for s in [*us.states.STATES, us.states.DC]}
+
+
+def _country_names():
+    import pycountry
+    return {c.alpha_2: c.name for c in pycountry.countries}
+
+
+def build_gazetteer(path: str = GAZETTEER_PATH) -> str:
+    """Compile the lookup table from installed package data; returns the .npy path."""
+    import geotext
+    import pycountry
+
+    countries = _country_names()
+    us_states = _us_state_names()
+    outcomes, outcome_ids = [], {}
+    entries = {}      # key -> (outcome, kind, population)
+    ambiguous = set()
+
+    def outcome(country, state):
+        pair = (country, state)
+        if pair not in outcome_ids:
+            outcome_ids[pair] = len(outcomes)
+            outcomes.append(pair)
+        return outcome_ids[pair]
+
+    def add(name, country, state, kind, population=0):
+        norm = normalize_place(name)
+        words = norm.split(" ")
+        if not norm or len(words) > MAX_NAME_WORDS or (len(words) == 1 and len(norm) < MIN_NAME_LENGTH):
+            return
+        key = place_key(norm)
+        if key in ambiguous:
+            return
+        new = (outcome(country, state), kind, population)
+        old = entries.get(key)
+        if old is None:
+            entries[key] = new
+        elif kind == REGION and old[1] == REGION:
+            # Same region name in two places (e.g. "Central"): no way to tell which is meant
+            if outcomes[old[0]][0] != country:
+                del entries[key]
+                ambiguous.add(key)
+        elif (kind, -population) < (old[1], -old[2]):
+            entries[key] = new
+
+    for subdiv in pycountry.subdivisions:
+        country = countries.get(subdiv.country_code)
+        if not country:
+            continue
+        state = us_states.get(subdiv.code.split("-")[1], subdiv.name) if subdiv.country_code == "US" else subdiv.name
+        add(subdiv.name, country, state, REGION)
+
+    us_cities = {}
+    cities_path = os.path.join(os.path.dirname(geotext.__file__), "data", "cities15000.txt")
+    with open(cities_path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 15 or cols[8] not in countries:
+                continue
+            country = countries[cols[8]]
+            state = us_states.get(cols[10]) if cols[8] == "US" else None
+            population = int(cols[14] or 0)
+            for name in {cols[1], cols[2]}:
+                add(name, country, state, CITY, population)
+                norm = normalize_place(name)
+                if cols[8] == "US" and norm and population > us_cities.get(norm, (None, -1))[1]:
+                    us_cities[norm] = (outcome(country, state), population)
+
+    # Postal prefixes live in the same table under "zip3:" / "fsa:" keys
+    postal = {}
+    for lo, hi, abbr in US_ZIP3_RANGES:
+        for prefix in range(lo, hi + 1):
+            postal[place_key(f"zip3:{prefix:03d}")] = (outcome("United States", us_states[abbr]), REGION, 0)
+    for letter, province in CA_FSA_PROVINCES.items():
+        postal[place_key(f"fsa:{letter.lower()}")] = (outcome("Canada", province), REGION, 0)
+    for abbr, state in us_states.items():
+        postal[place_key(f"usps:{abbr.lower()}")] = (outcome("United States", state), REGION, 0)
+    # Only needed where a name's best match (city or region) is outside the US
+    for norm, (out, population) in us_cities.items():
+        best = entries.get(place_key(norm))
+        if best is None or outcomes[best[0]][0] != "United States":
+            postal[place_key(f"us:{norm}")] = (out, CITY, population)
+    entries.update(postal)
+
+    keys = np.fromiter(entries, dtype=np.uint64, count=len(entries))
+    values = np.fromiter((_pack(*v) for v in entries.values()), dtype=np.uint64, count=len(entries))
+    order = np.argsort(keys)
+    table = np.stack([keys[order], values[order]])
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write-then-rename so concurrent builders (e.g. several parse workers) never see a partial file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    np.save(f"{tmp}.npy", table)
+    with open(f"{tmp}.json", "w", encoding="utf-8") as f:
+        json.dump({"version": GAZETTEER_VERSION, "outcomes": outcomes}, f)
+    os.replace(f"{tmp}.npy", f"{path}.npy")
+    os.replace(f"{tmp}.json", f"{path}.json")
+    logger.info(f"[Gazetteer] Built {len(entries)} entries ({len(outcomes)} places) at {path}.npy")
+    return f"{path}.npy"
+
+
+class Gazetteer:
+    """Read-only view over a compiled gazetteer table."""
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        # Plain ndarray views of the mapping; np.memmap adds per-call overhead to searchsorted
+        table = np.asarray(np.load(f"{path}.npy", mmap_mode="r"))
+        self.keys, self.values = table[0], table[1]
+        with open(f"{path}.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != GAZETTEER_VERSION:
+            raise ValueError(f"{path} is gazetteer version {meta.get('version')}, expected {GAZETTEER_VERSION}")
+        self.outcomes = [tuple(o) for o in meta["outcomes"]]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _entry(self, norm: str) -> Optional[Tuple[int, int, int]]:
+        key = np.uint64(place_key(norm))   # a Python int would make searchsorted convert the whole array
+        i = int(self.keys.searchsorted(key))
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        v = int(self.values[i])
+        return v >> 36, (v >> 32) & 0xF, v & 0xFFFFFFFF
+
+    def lookup(self, name: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(country, state) for an exact city or region name, or None."""
+        entry = self._entry(normalize_place(name))
+        return self.outcomes[entry[0]] if entry else None
+
+    def postal(self, text: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(country, state) from a Canadian postal code or a US ZIP+4 in text."""
+        m = CA_POSTAL.search(text)
+        if m:
+            entry = self._entry(f"fsa:{m.group(1).lower()}")
+            if entry:
+                return self.outcomes[entry[0]]
+        for m in US_ZIP.finditer(text):
+            if m.group(2):
+                entry = self._entry(f"zip3:{m.group(1)}")
+                if entry:
+                    return self.outcomes[entry[0]]
+        return None
+
+    def _us_zip_state(self, text: str) -> Optional[str]:
+        for m in US_ZIP.finditer(text):
+            entry = self._entry(f"zip3:{m.group(1)}")
+            if entry:
+                return self.outcomes[entry[0]][1]
+        return None
+
+    def _us_state_after(self, text: str, end: int) -> Optional[str]:
+        """US state named by an abbreviation or ZIP directly after text[:end], if any."""
+        m = US_STATE_AFTER.match(text, end)
+        if not m:
+            return None
+        entry = self._entry(f"usps:{m.group(1).lower()}" if m.group(1) else f"zip3:{m.group(2)}")
+        return self.outcomes[entry[0]][1] if entry else None
+
+    def _in_address(self, text: str, words, i: int, end: int) -> bool:
+        """
+        Whether a one-word city name at words[i] reads as a place rather than an
+        ordinary word ("Mobile apps", "Split the bill"): it follows a cue like "in",
+        is followed by ", <region>", or the text has a postal code.
+        """
+        if i and words[i - 1].group().casefold() in ADDRESS_CUES:
+            return True
+        if CA_POSTAL.search(text) or US_ZIP.search(text):
+            return True
+        following = words[i + 1:i + 1 + MAX_NAME_WORDS]
+        if not following or text[end:following[0].start()].strip() != ",":
+            return False
+        for n in range(len(following), 0, -1):
+            entry = self._entry(normalize_place(" ".join(w.group() for w in following[:n])))
+            if entry and entry[1] == REGION:
+                return True
+        return False
+
+    def locate(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Best (country, state) for an address-like line. Postal codes win, then
+        region names, then the most populous city named. Only phrases starting
+        with a capitalized word are tried, and a one-word city only counts in an
+        address-like position (see _in_address). A name followed by a US state
+        abbreviation or ZIP ("Cambridge, MA 02139") resolves to the US city of
+        that name when there is one; a plain 5-digit ZIP elsewhere in the line
+        refines the state when the place found is in the US.
+        """
+        found = self.postal(text)
+        if found:
+            return found
+
+        words = list(_WORD.finditer(text))
+        best = None
+        for i, first in enumerate(words):
+            if not first.group()[:1].isupper():
+                continue
+            for n in range(min(MAX_NAME_WORDS, len(words) - i), 0, -1):
+                norm = normalize_place(" ".join(w.group() for w in words[i:i + n]))
+                entry = self._entry(norm)
+                if not entry:
+                    continue
+                end = words[i + n - 1].end()
+                us_state = self._us_state_after(text, end)
+                if us_state and (self.outcomes[entry[0]][0] == "United States" or self._entry(f"us:{norm}")):
+                    return "United States", us_state
+                if entry[1] == CITY and n == 1 and not us_state and not self._in_address(text, words, i, end):
+                    break
+                rank = (entry[1], -entry[2])
+                if best is None or rank < best[0]:
+                    best = (rank, entry[0])
+                break   # the longest name starting here wins ("New York" over "York")
+
+        if best is None:
+            return None, None
+        country, state = self.outcomes[best[1]]
+        if country == "United States":
+            state = self._us_zip_state(text) or state
+        return country, state
+
+
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer(path: str = GAZETTEER_PATH) -> Optional[Gazetteer]:
+    """
+    Shared Gazetteer, built on first use. None (logged once, then cached) if the
+    source data isn't installed or the table can't be written or read.
+    """
+    with _lock:
+        try:
+            try:
+                return Gazetteer(path)
+            except (FileNotFoundError, ValueError):
+                build_gazetteer(path)
+                return Gazetteer(path)
+        except (ImportError, OSError) as e:
+            logger.warning(f"[Gazetteer] Can't build the offline gazetteer: {e}")
+            return None
+
+
+if __name__ == "__main__":
+    build_gazetteer()
@@ -0,0 +1,259 @@
+import email.utils
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+
+from sqlalchemy import (
+    Column, Float, Integer, LargeBinary, MetaData, String, Table, Text,
+    create_engine, delete, event, func, select, update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from scraper.logging_config import logger
+from scraper.scraper_config import (
+    HTTP_CACHE_PATH, HTTP_CACHE_MAX_ENTRIES, HTTP_CACHE_MIN_FRESH_SECONDS, HTTP_CACHE_MAX_BODY_BYTES,
+)
+
+# Response headers kept with a cached page; everything else is dropped
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Expires", "Date")
+
+metadata = MetaData()
+http_responses = Table(
+    "http_responses", metadata,
+    Column("url", String(2048), primary_key=True),
+    Column("status", Integer, nullable=False),
+    Column("final_url", String(2048), nullable=False),
+    Column("headers", Text, nullable=False),
+    Column("encoding", String(64)),
+    Column("body_hash", String(64), nullable=False, index=True),
+    Column("stored_at", Float, nullable=False),
+    Column("fresh_until", Float, nullable=False),
+    Column("last_access", Float, nullable=False, index=True),
+)
+# Content-addressed: pages that are byte-identical (e.g. the same site under two URLs) share a row
+http_bodies = Table(
+    "http_bodies", metadata,
+    Column("hash", String(64), primary_key=True),
+    Column("body", LargeBinary, nullable=False),   # zlib-compressed
+    Column("size", Integer, nullable=False),
+)
+
+
+def _cache_control(headers) -> dict:
+    directives = {}
+    for part in (headers.get("Cache-Control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+def freshness_lifetime(headers, min_fresh: float = HTTP_CACHE_MIN_FRESH_SECONDS) -> float | None:
+    """
+    Seconds a response may be reused without revalidating, or None if it must
+    not be stored. no-cache / must-revalidate with max-age=0 mean "always
+    revalidate"; otherwise max-age (or Expires) is raised to at least min_fresh.
+    """
+    cc = _cache_control(headers)
+    if "no-store" in cc:
+        return None
+    max_age = cc.get("s-maxage") or cc.get("max-age")
+    if "no-cache" in cc or ("must-revalidate" in cc and max_age == "0"):
+        return 0.0
+    lifetime = 0.0
+    if max_age and max_age.isdigit():
+        lifetime = float(max_age)
+    elif headers.get("Expires"):
+        try:
+            expires = email.utils.parsedate_to_datetime(headers["Expires"]).timestamp()
+            date = email.utils.parsedate_to_datetime(headers["Date"]).timestamp() if headers.get("Date") else time.time()
+            lifetime = max(0.0, expires - date)
+        except (TypeError, ValueError):
+            pass
+    return max(lifetime, min_fresh)
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status: int
+    final_url: str
+    headers: dict
+    encoding: str | None
+    body: bytes
+    fresh: bool
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding or "utf-8", errors="replace")
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating this response."""
+        out = {}
+        if self.headers.get("ETag"):
+            out["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            out["If-Modified-Since"] = self.headers["Last-Modified"]
+        return out
+
+
+class HttpCache:
+    """
+    SQLite-backed cache of fetched pages, shared by the sync and async fetch
+    paths and across reruns. Responses are reused while fresh, then revalidated
+    with If-None-Match / If-Modified-Since; bodies are stored compressed, once
+    per distinct content. The least recently used responses are evicted past max_entries.
+    """
+
+    def __init__(
+        self,
+        path: str = HTTP_CACHE_PATH,
+        max_entries: int = HTTP_CACHE_MAX_ENTRIES,
+        min_fresh: float = HTTP_CACHE_MIN_FRESH_SECONDS,
+        max_body_bytes: int = HTTP_CACHE_MAX_BODY_BYTES,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.min_fresh = min_fresh
+        self.max_body_bytes = max_body_bytes
+        self._engine = None
+        self._lock = threading.Lock()
+        self._counters = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "uncacheable": 0, "evictions": 0}
+
+    @property
+    def engine(self):
+        with self._lock:
+            if self._engine is None:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                engine = create_engine(
+                    f"sqlite:///{self.path}",
+                    connect_args={"check_same_thread": False, "timeout": 30},
+                )
+
+                @event.listens_for(engine, "connect")
+                def _set_pragmas(dbapi_conn, _):
+                    cur = dbapi_conn.cursor()
+                    cur.execute("PRAGMA journal_mode=WAL")
+                    cur.execute("PRAGMA synchronous=NORMAL")
+                    cur.close()
+
+                metadata.create_all(engine)
+                self._engine = engine
+            return self._engine
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def lookup(self, url: str) -> CachedResponse | None:
+        now = time.time()
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(http_responses, http_bodies.c.body)
+                .join(http_bodies, http_bodies.c.hash == http_responses.c.body_hash)
+                .where(http_responses.c.url == url)
+            ).first()
+            if row is None:
+                return None
+            conn.execute(update(http_responses).where(http_responses.c.url == url).values(last_access=now))
+        return CachedResponse(
+            url=url,
+            status=row.status,
+            final_url=row.final_url,
+            headers=json.loads(row.headers),
+            encoding=row.encoding,
+            body=zlib.decompress(row.body),
+            fresh=row.fresh_until > now,
+        )
+
+    def store(self, url: str, status: int, final_url: str, headers, encoding: str | None, body: bytes) -> bool:
+        """Store a 200 response; returns False if it isn't cacheable."""
+        lifetime = freshness_lifetime(headers, self.min_fresh)
+        if status != 200 or lifetime is None or len(body) > self.max_body_bytes:
+            self.count("uncacheable")
+            return False
+        now = time.time()
+        digest = hashlib.sha256(body).hexdigest()
+        kept = {h: headers[h] for h in STORED_HEADERS if headers.get(h)}
+        row = {
+            "url": url, "status": status, "final_url": final_url, "headers": json.dumps(kept),
+            "encoding": encoding, "body_hash": digest, "stored_at": now,
+            "fresh_until": now + lifetime, "last_access": now,
+        }
+        with self.engine.begin() as conn:
+            previous = conn.execute(select(http_responses.c.body_hash).where(http_responses.c.url == url)).scalar()
+            conn.execute(
+                sqlite_insert(http_bodies)
+                .values(hash=digest, body=zlib.compress(body), size=len(body))
+                .on_conflict_do_nothing(index_elements=["hash"])
+            )
+            stmt = sqlite_insert(http_responses).values(**row)
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=["url"], set_={k: stmt.excluded[k] for k in row if k != "url"},
+            ))
+            if previous and previous != digest:
+                self._drop_unreferenced(conn, [previous])
+            self._evict(conn)
+        self.count("stored")
+        return True
+
+    def refresh(self, url: str, headers):
+        """After a 304: extend freshness and take any new validators the server sent."""
+        now = time.time()
+        lifetime = freshness_lifetime(headers, self.min_fresh) or 0.0
+        with self.engine.begin() as conn:
+            current = conn.execute(select(http_responses.c.headers).where(http_responses.c.url == url)).scalar()
+            if current is None:
+                return
+            merged = {**json.loads(current), **{h: headers[h] for h in STORED_HEADERS if headers.get(h)}}
+            conn.execute(
+                update(http_responses).where(http_responses.c.url == url)
+                .values(headers=json.dumps(merged), fresh_until=now + lifetime, last_access=now)
+            )
+        self.count("revalidated")
+
+    def _drop_unreferenced(self, conn, hashes):
+        # A body can be shared by several URLs, so only drop it once nothing points at it
+        for digest in set(hashes):
+            if conn.execute(select(http_responses.c.url).where(http_responses.c.body_hash == digest).limit(1)).first() is None:
+                conn.execute(delete(http_bodies).where(http_bodies.c.hash == digest))
+
+    def _evict(self, conn):
+        total = conn.execute(select(func.count()).select_from(http_responses)).scalar_one()
+        excess = total - self.max_entries
+        if excess <= 0:
+            return
+        oldest = conn.execute(
+            select(http_responses.c.url, http_responses.c.body_hash)
+            .order_by(http_responses.c.last_access)
+            .limit(excess)
+        ).all()
+        conn.execute(delete(http_responses).where(http_responses.c.url.in_([url for url, _ in oldest])))
+        self._drop_unreferenced(conn, [digest for _, digest in oldest])
+        self.count("evictions", excess)
+        logger.debug(f"[HttpCache] Evicted {excess} least recently used responses")
+
+    def clear(self):
+        with self.engine.begin() as conn:
+            conn.execute(delete(http_responses))
+            conn.execute(delete(http_bodies))
+
+    def stats(self) -> dict:
+        with self.engine.connect() as conn:
+            entries = conn.execute(select(func.count()).select_from(http_responses)).scalar_one()
+            bodies, raw, stored = conn.execute(
+                select(func.count(), func.coalesce(func.sum(http_bodies.c.size), 0),
+                       func.coalesce(func.sum(func.length(http_bodies.c.body)), 0))
+            ).one()
+        with self._lock:
+            counters = dict(self._counters)
+        counters.update(entries=entries, bodies=bodies, body_bytes=raw, stored_bytes=stored)
+        return counters
+
+
+http_cache = HttpCache()
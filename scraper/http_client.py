@@ -0,0 +1,144 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from requests.structures import CaseInsensitiveDict
+
+from scraper.http_cache import CachedResponse, http_cache
+from scraper.logging_config import logger
+from scraper.scraper_config import (
+    FAKE_CHROME_HEADERS, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_RETRIES, HTTP_BACKOFF_FACTOR,
+    HTTP_CACHE_ENABLED,
+)
+
+_stats_lock = threading.Lock()
+_stats = {"opened": 0, "reused": 0}
+
+
+class _CountingPoolMixin:
+    """Count whether each checked-out connection still has a live socket (reuse) or must connect."""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        key = "opened" if getattr(conn, "sock", None) is None else "reused"
+        with _stats_lock:
+            _stats[key] += 1
+        return conn
+
+
+class CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+
+def build_session(
+    pool_maxsize: int = HTTP_POOL_MAXSIZE,
+    retry_statuses: tuple[int, ...] = (500, 502, 503, 504),
+) -> requests.Session:
+    """
+    Session with keep-alive pools sized for the scraper's worker threads and a
+    conservative retry policy: retry_statuses are retried with a short backoff,
+    and Retry-After is ignored, so a server asking for an hour can't park a
+    worker thread in urllib3. 429s are returned to the caller (Bing has its own
+    handling).
+    """
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=1,
+        read=1,
+        status=HTTP_RETRIES if retry_statuses else 0,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=retry_statuses,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+    adapter = PooledAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    s = requests.Session()
+    s.headers.update(FAKE_CHROME_HEADERS)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+# Shared by every sync fetch path in the scraper package
+session = build_session()
+# For rate-limited hosts (see rate_limiter.throttled_get): a 503 must reach the
+# host's limiter so it can slow down, not be retried and slept on in urllib3
+throttled_session = build_session(retry_statuses=())
+
+
+def get(url: str, timeout: float = 5, **kwargs) -> requests.Response:
+    return session.get(url, timeout=timeout, **kwargs)
+
+
+def head(url: str, timeout: float = 5, **kwargs) -> requests.Response:
+    return session.head(url, timeout=timeout, **kwargs)
+
+
+def _from_cache(entry: CachedResponse) -> requests.Response:
+    r = requests.Response()
+    r.status_code = entry.status
+    r.url = entry.final_url
+    r.headers = CaseInsensitiveDict(entry.headers)
+    r.encoding = entry.encoding
+    r._content = entry.body
+    r.from_cache = True
+    return r
+
+
+def cached_get(url: str, timeout: float = 5, headers: dict | None = None, **kwargs) -> requests.Response:
+    """
+    get() through the shared HTTP cache: a fresh copy is returned without a
+    request, a stale one is revalidated with its ETag/Last-Modified and reused
+    on a 304. Cached responses have `from_cache` set.
+    """
+    if not HTTP_CACHE_ENABLED:
+        return get(url, timeout=timeout, headers=headers, **kwargs)
+    try:
+        entry = http_cache.lookup(url)
+    except Exception as e:
+        logger.warning(f"[HttpCache] read failed for {url}: {e}")
+        entry = None
+    if entry and entry.fresh:
+        http_cache.count("fresh_hits")
+        return _from_cache(entry)
+
+    conditional = {**(headers or {}), **(entry.validators() if entry else {})}
+    r = get(url, timeout=timeout, headers=conditional or None, **kwargs)
+    try:
+        if r.status_code == 304 and entry:
+            http_cache.refresh(url, r.headers)
+            return _from_cache(entry)
+        http_cache.count("misses")
+        http_cache.store(url, r.status_code, r.url, r.headers, r.encoding or r.apparent_encoding, r.content)
+    except Exception as e:
+        logger.warning(f"[HttpCache] write failed for {url}: {e}")
+    return r
+
+
+def stats() -> dict:
+    with _stats_lock:
+        s = dict(_stats)
+    total = s["opened"] + s["reused"]
+    s["reuse_rate"] = s["reused"] / total if total else 0.0
+    return s
@@ -1,5 +1,6 @@
-from typing import Optional, Tuple, List
-from bs4 import BeautifulSoup
+from functools import lru_cache
+from typing import Optional, Tuple
+from scraper.page_analysis import PageAnalysis
 import logging
 import re
 
@@ -27,12 +28,8 @@ try:
 except ImportError:
     GEOTEXT_AVAILABLE = False
 
-try:
-    from geopy.geocoders import Nominatim
-    geolocator = Nominatim(user_agent="company-locator")
-    GEOPY_AVAILABLE = True
-except ImportError:
-    GEOPY_AVAILABLE = False
+from scraper.gazetteer import get_gazetteer
+from scraper.regions import assign_region  # noqa: F401  (re-exported for the scrapers)
 
 
 logger = logging.getLogger(__name__)
@@ -50,32 +47,145 @@ def is_probably_junk(text: str) -> bool:
     return False
 
 
-def extract_location_from_text(text: str) -> Tuple[Optional[str], Optional[str]]:
-    # known city-to-country/state map
-    city_country_map = {
-        "gliwice": ("Poland", None),
-        "düsseldorf": ("Germany", None),
-        "bc": ("Canada", "British Columbia"),
-    }
-
-    text_lower = text.lower()
-    for city, (country, state) in city_country_map.items():
-        if re.search(rf"\b{re.escape(city)}\b", text_lower):
-            return country, state
+# known city-to-country/state map
+CITY_COUNTRY_MAP = {
+    "gliwice": ("Poland", None),
+    "düsseldorf": ("Germany", None),
+    "bc": ("Canada", "British Columbia"),
+}
+
+
+_WORD = re.compile(r"\w+")
+_ABBR_CONTEXT = re.compile(r"\s+\d{5}|\s*,")
+
+
+def _build_known_location_index():
+    """
+    Phrase tables for every known city, US state name and US state abbreviation,
+    each tagged with its lookup priority (city map first, then each state's name
+    before its abbreviation). Phrases are keyed by their first word so one
+    tokenizing pass over the text finds every hit. City-map entries must be plain
+    words separated by single spaces; they match case-insensitively.
+    """
+    outcomes = []
+    cased, folded, abbrs = {}, {}, {}
+
+    def add(table, phrase, outcome):
+        first, *rest = phrase.split(" ")
+        table.setdefault(first, []).append((tuple(rest), len(outcomes)))
+        outcomes.append(outcome)
+
+    for city, (country, state) in CITY_COUNTRY_MAP.items():
+        add(folded, city.lower(), (country, state, None))
 
-    # US state matching
     if US_AVAILABLE:
         for state in us.states.STATES:
-            # Match full state name
-            if re.search(rf'\b{re.escape(state.name)}\b', text):
-                print(f"[MATCH] Regex full name match: {state.name}")
-                return "United States", state.name
-
-            # Match abbreviation only if followed by zip or comma
-            if re.search(rf'\b{state.abbr}\b(?=\s+\d{{5}}|\s*,)', text):
-                print(f"[MATCH] Regex abbreviation + context match: {state.abbr} ({state.name})")
-                return "United States", state.name
-    
+            add(cased, state.name,
+                ("United States", state.name, f"[MATCH] Regex full name match: {state.name}"))
+            abbrs[state.abbr] = len(outcomes)
+            outcomes.append(("United States", state.name,
+                             f"[MATCH] Regex abbreviation + context match: {state.abbr} ({state.name})"))
+
+    return cased, folded, abbrs, outcomes
+
+
+KNOWN_CASED, KNOWN_FOLDED, KNOWN_ABBRS, KNOWN_OUTCOMES = _build_known_location_index()
+
+
+def _phrase_continues(text, tokens, i, rest, fold):
+    for j, expected in enumerate(rest, start=1):
+        if i + j >= len(tokens):
+            return False
+        prev, tok = tokens[i + j - 1], tokens[i + j]
+        if text[prev.end():tok.start()] != " ":
+            return False
+        word = tok.group()
+        if (word.lower() if fold else word) != expected:
+            return False
+    return True
+
+
+def match_known_location(text: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Best city-map / US-state hit in text in a single pass, with the same precedence
+    (and word-boundary rules) as trying each city and state regex one by one.
+    State abbreviations only count when followed by a ZIP code or a comma.
+    """
+    tokens = list(_WORD.finditer(text))
+    best = None
+    for i, tok in enumerate(tokens):
+        word = tok.group()
+        for table, key, fold in ((KNOWN_CASED, word, False), (KNOWN_FOLDED, word.lower(), True)):
+            for rest, prio in table.get(key, ()):
+                if (best is None or prio < best) and _phrase_continues(text, tokens, i, rest, fold):
+                    best = prio
+        prio = KNOWN_ABBRS.get(word)
+        if prio is not None and (best is None or prio < best) and _ABBR_CONTEXT.match(text, tok.end()):
+            best = prio
+        if best == 0:
+            break
+
+    if best is None:
+        return None
+    country, state, message = KNOWN_OUTCOMES[best]
+    if message:
+        print(message)
+    return country, state
+
+
+@lru_cache(maxsize=4096)
+def fuzzy_country_name(query: str) -> Optional[str]:
+    """
+    Name of pycountry's best search_fuzzy match, or None when it raises LookupError.
+    search_fuzzy is a linear scan over every country and subdivision, and the words
+    fed to it on corporate pages repeat a lot, so hits and misses are both memoized.
+    """
+    try:
+        return pycountry.countries.search_fuzzy(query)[0].name
+    except LookupError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _subdivision_index():
+    """
+    Lowercased subdivision names (pycountry order, only those whose country resolves),
+    their country names, and a trigram -> [subdivision positions] index. Built on first use.
+    """
+    names, countries, postings = [], [], {}
+    for subdiv in pycountry.subdivisions:
+        country = pycountry.countries.get(alpha_2=subdiv.country_code)
+        if not country:
+            continue
+        name = subdiv.name.lower()
+        idx = len(names)
+        names.append(name)
+        countries.append(country.name)
+        for gram in {name[i:i + 3] for i in range(len(name) - 2)}:
+            postings.setdefault(gram, []).append(idx)
+    return names, countries, postings
+
+
+@lru_cache(maxsize=8192)
+def subdivision_country(token: str) -> Optional[str]:
+    """Country of the first subdivision (in pycountry order) whose lowercased name contains token."""
+    names, countries, postings = _subdivision_index()
+    grams = {token[i:i + 3] for i in range(len(token) - 2)}
+    if not grams:
+        return None
+    # Every match contains all of the token's trigrams, so scanning the rarest one's postings suffices
+    rarest = min((postings.get(g, ()) for g in grams), key=len)
+    for idx in rarest:
+        if token in names[idx]:
+            return countries[idx]
+    return None
+
+
+def extract_location_from_text(text: str) -> Tuple[Optional[str], Optional[str]]:
+    known = match_known_location(text)
+    if known:
+        return known
+
     # GeoText for country/city detection
     if GEOTEXT_AVAILABLE:
         try:
@@ -83,11 +193,8 @@ def extract_location_from_text(text: str) -> Tuple[Optional[str], Optional[str]]
             if places.countries:
                 country = places.countries[0]
                 if PYCOUNTRY_AVAILABLE:
-                    try:
-                        match = pycountry.countries.get(name=country) or pycountry.countries.search_fuzzy(country)[0]
-                        country = match.name
-                    except LookupError:
-                        pass
+                    exact = pycountry.countries.get(name=country)
+                    country = exact.name if exact else (fuzzy_country_name(country) or country)
                 return country, None
         except Exception as e:
             logger.warning(f"GeoText failed: {e}")
@@ -96,25 +203,16 @@ def extract_location_from_text(text: str) -> Tuple[Optional[str], Optional[str]]
     if PYCOUNTRY_AVAILABLE:
         tokens = re.findall(r'\b[\w\-\d]{3,}\b', text)
         for token in tokens:
-            try:
-                for subdiv in pycountry.subdivisions:
-                    if token.lower() in subdiv.name.lower():
-                        country = pycountry.countries.get(alpha_2=subdiv.country_code)
-                        if country:
-                            return country.name, None
-            except Exception:
-                continue
+            country = subdivision_country(token.lower())
+            if country:
+                return country, None
     
-    # Fallback: Use geopy/Nominatim to geocode any city or postal-like line
-    if GEOPY_AVAILABLE:
-        try:
-            location = geolocator.geocode(text, addressdetails=True, language='en', timeout=5)
-            if location and 'country' in location.raw['address']:
-                country = location.raw['address']['country']
-                state = location.raw['address'].get('state')
-                return country, state
-        except Exception as e:
-            logger.warning(f"Geopy fallback failed: {e}")
+    # Fallback: offline gazetteer of cities, regions and postal prefixes
+    gazetteer = get_gazetteer()
+    if gazetteer:
+        country, state = gazetteer.locate(text)
+        if country:
+            return country, state
 
     return None, None
   
@@ -149,13 +247,10 @@ def score_location(line: str) -> int:
     if PYCOUNTRY_AVAILABLE:
         tokens = re.findall(r"\\b[A-Z][a-z]+\\b", line)  # Capitalized words
         for token in tokens:
-            try:
-                country = pycountry.countries.search_fuzzy(token)[0]
-                if country.name.lower() not in {'georgia', 'guinea'}:  # filter ambiguous
-                    score += 20
-                    break
-            except LookupError:
-                continue
+            country = fuzzy_country_name(token)
+            if country and country.lower() not in {'georgia', 'guinea'}:  # filter ambiguous
+                score += 20
+                break
 
     # Reduce if only vague footer content
     if any(term in line_lower for term in ['copyright', 'terms of use', 'privacy policy']):
@@ -170,32 +265,28 @@ def score_location(line: str) -> int:
     return score
 
 
-def parse_contact_page(soup: BeautifulSoup, html_content: str, body_lines: List[str]) -> Tuple[Optional[str], Optional[str]]:
+def parse_contact_page(page: PageAnalysis) -> Tuple[Optional[str], Optional[str]]:
+    country, state, _ = score_contact_page(page)
+    return country, state
+
 
+def score_contact_page(page: PageAnalysis) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+    """(country, state, score of the winning candidate); score is None when nothing was scored."""
     candidates = []
 
     # Strategy 1: Contact page candidates
-    for selector in [
-        '[class*="address"]', '[class*="contact"]', '[class*="location"]',
-        '[class*="headquarters"]', '[class*="office"]', '[id*="address"]',
-        '[id*="contact"]', '[id*="location"]'
-    ]:
-        for element in soup.select(selector):
-            if element.name == "script":
-                continue
-            text = element.get_text(" ", strip=True)
-            if is_probably_junk(text):
-                continue
-            score = score_location(text)
-            if score > 0:
-                print(f"    [DEBUG] {selector} snippet: {text[:100]}... (score={score})")
-                c, s = extract_location_from_text(text)
-                candidates.append((score + 10, c, s))  # bonus for being a structured tag
+    for selector, text in page.structured_texts:
+        if is_probably_junk(text):
+            continue
+        score = score_location(text)
+        if score > 0:
+            print(f"    [DEBUG] {selector} snippet: {text[:100]}... (score={score})")
+            c, s = extract_location_from_text(text)
+            candidates.append((score + 10, c, s))  # bonus for being a structured tag
 
     # Strategy 2: Footer
-    footer = soup.find("footer")
-    if footer:
-        text = footer.get_text(" ", strip=True)
+    text = page.footer_text
+    if text is not None:
         if is_probably_junk(text) is False:
             score = score_location(text)
             print(f"    [DEBUG] Footer snippet: {text[:100]}... (score={score})")
@@ -203,7 +294,7 @@ def parse_contact_page(soup: BeautifulSoup, html_content: str, body_lines: List[
             candidates.append((score + 5, c, s))  # lower bonus than structured contact tags
 
     # Strategy 3: Heuristic line scan
-    for line in body_lines:
+    for line in page.lines:
         if is_probably_junk(line):
             continue
         score = score_location(line)
@@ -213,7 +304,7 @@ def parse_contact_page(soup: BeautifulSoup, html_content: str, body_lines: List[
             candidates.append((score, c, s))
 
     found_countries = set()
-    for line in body_lines:
+    for line in page.lines:
         matches = COUNTRY_REGEX.findall(line)
         found_countries.update(match.strip().title() for match in matches)
 
@@ -224,7 +315,7 @@ def parse_contact_page(soup: BeautifulSoup, html_content: str, body_lines: List[
         print(f"🌍 Multinational detected from countries: {found_countries}")
         country = "Multinational"
         state = None
-        return country, state
+        return country, state, None
 
     # Pick best-scoring valid result
     candidates = [item for item in candidates if item[1]]  # must have a country
@@ -232,71 +323,7 @@ def parse_contact_page(soup: BeautifulSoup, html_content: str, body_lines: List[
         candidates.sort(key=lambda x: x[0], reverse=True)
         top = candidates[0]
         print(f"    [DEBUG] Selected → country={top[1]}, state={top[2]} (score={top[0]})")
-        return top[1], top[2]
+        return top[1], top[2], top[0]
 
     print("    [DEBUG] No valid candidates found.")
-    return None, None
-
-
-def assign_region(country: Optional[str], state: Optional[str]) -> str:
-    """Map (country, state) to one of: 'NA Northeast', 'NA Midwest', 'NA South', 'NA West', 'EU', 'APAC', or 'Other'."""
-    if not country:
-        return "Other"
-    
-    if country == "Multinational":
-        return "Multinational"
-
-    if country.lower() == "united states":
-        us_ne = {
-            "Connecticut", "Maine", "Massachusetts", "New Hampshire",
-            "Rhode Island", "Vermont", "New Jersey", "New York", "Pennsylvania"
-        }
-        us_mw = {
-            "Illinois", "Indiana", "Michigan", "Ohio", "Wisconsin",
-            "Iowa", "Kansas", "Minnesota", "Missouri", "Nebraska",
-            "North Dakota", "South Dakota"
-        }
-        us_s = {
-            "Delaware", "Florida", "Georgia", "Maryland", "North Carolina",
-            "South Carolina", "Virginia", "District of Columbia", "West Virginia",
-            "Alabama", "Kentucky", "Mississippi", "Tennessee",
-            "Arkansas", "Louisiana", "Oklahoma", "Texas"
-        }
-        us_w = {
-            "Arizona", "Colorado", "Idaho", "Montana", "Nevada",
-            "New Mexico", "Utah", "Wyoming",
-            "Alaska", "California", "Hawaii", "Oregon", "Washington"
-        }
-
-        s = (state or "").title().strip()
-        if s in us_ne:
-            return "NA Northeast"
-        if s in us_mw:
-            return "NA Midwest"
-        if s in us_s:
-            return "NA South"
-        if s in us_w:
-            return "NA West"
-        return "Other"
-
-    eu_countries = {
-        'germany', 'france', 'italy', 'spain', 'netherlands', 'belgium', 
-        'austria', 'switzerland', 'sweden', 'denmark', 'norway', 'finland',
-        'poland', 'united kingdom', 'ireland', 'portugal', 'greece', 'czech republic'
-    }
-
-    if country.lower() in eu_countries:
-        return "EU"
-
-    apac_countries = {
-        'japan', 'china', 'south korea', 'singapore', 'australia', 'india',
-        'taiwan', 'hong kong', 'thailand', 'malaysia', 'philippines', 'indonesia'
-    }
-
-    if country.lower() in apac_countries:
-        return "APAC"
-
-    if country.lower() == 'canada':
-        return "Other"
-
-    return "Other"
+    return None, None, None
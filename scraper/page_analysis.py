@@ -0,0 +1,56 @@
+from functools import cached_property
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from scraper.scraper_config import HTML_PARSER
+
+# Elements that tend to hold a postal address, in the order parse_contact_page tries them
+LOCATION_SELECTORS = [
+    '[class*="address"]', '[class*="contact"]', '[class*="location"]',
+    '[class*="headquarters"]', '[class*="office"]', '[id*="address"]',
+    '[id*="contact"]', '[id*="location"]'
+]
+
+
+class PageAnalysis:
+    """
+    One fetched page, parsed once. The text views used by the location strategies
+    (body lines, footer text, address-like elements) are computed on first access
+    and shared by every strategy that needs them.
+    """
+
+    def __init__(self, url: Optional[str], html: str, parser: str = HTML_PARSER):
+        self.url = url
+        self.html = html
+        self.parser = parser
+
+    @classmethod
+    def from_soup(cls, soup: BeautifulSoup, url: Optional[str] = None) -> "PageAnalysis":
+        page = cls(url, "")
+        page.__dict__["soup"] = soup
+        return page
+
+    @cached_property
+    def soup(self) -> BeautifulSoup:
+        return BeautifulSoup(self.html, self.parser)
+
+    @cached_property
+    def lines(self) -> List[str]:
+        return [ln.strip() for ln in self.soup.get_text("\n").split("\n") if ln.strip()]
+
+    @cached_property
+    def footer_text(self) -> Optional[str]:
+        footer = self.soup.find("footer")
+        return footer.get_text(" ", strip=True) if footer else None
+
+    @cached_property
+    def structured_texts(self) -> List[Tuple[str, str]]:
+        """(selector, text) for every non-script element matching LOCATION_SELECTORS."""
+        out = []
+        for selector in LOCATION_SELECTORS:
+            for element in self.soup.select(selector):
+                if element.name == "script":
+                    continue
+                out.append((selector, element.get_text(" ", strip=True)))
+        return out
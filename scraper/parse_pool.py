@@ -0,0 +1,90 @@
+import asyncio
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from scraper.gazetteer import get_gazetteer
+from scraper.logging_config import logger
+from scraper.scraper_config import LOCATION_PARSE_WORKERS
+
+# (contact link to follow, None) or (None, (country, state, score))
+PageScan = Tuple[Optional[str], Optional[Tuple[Optional[str], Optional[str], Optional[int]]]]
+
+
+def scan_page(url: str, html: str, follow_contact: bool) -> PageScan:
+    """
+    Parse one fetched page. If follow_contact and the page links to a contact
+    page, return that link; otherwise return the page's best location guess.
+    Runs in a worker process, so it takes and returns only plain values.
+    """
+    # Imported here so the parent doesn't need them just to start the pool
+    from scraper.company_processor import find_contact_link
+    from scraper.location_utils import score_contact_page
+    from scraper.page_analysis import PageAnalysis
+
+    page = PageAnalysis(url, html)
+    if follow_contact:
+        contact_url = find_contact_link(page.soup, url)
+        if contact_url:
+            return contact_url, None
+    return None, score_contact_page(page)
+
+
+def _warm_up():
+    # Import the location tables, build the subdivision index and map the gazetteer before the first page arrives
+    from scraper.location_utils import PYCOUNTRY_AVAILABLE, _subdivision_index, get_gazetteer
+    if PYCOUNTRY_AVAILABLE:
+        _subdivision_index()
+    get_gazetteer()
+
+
+def _free_threaded() -> bool:
+    return hasattr(sys, "_is_gil_enabled") and not sys._is_gil_enabled()
+
+
+_pool: Executor | None = None
+_pool_lock = threading.Lock()
+
+
+def parse_pool() -> Executor | None:
+    """
+    Shared executor for page parsing: processes by default, threads on a
+    free-threaded interpreter, None when LOCATION_PARSE_WORKERS is 0.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None and LOCATION_PARSE_WORKERS > 0:
+            if _free_threaded():
+                _pool = ThreadPoolExecutor(max_workers=LOCATION_PARSE_WORKERS, thread_name_prefix="parse")
+            else:
+                # Build the gazetteer file here once rather than in every worker at startup
+                get_gazetteer()
+                # spawn, not fork: the parent has event-loop and resolver threads running
+                _pool = ProcessPoolExecutor(
+                    max_workers=LOCATION_PARSE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_up,
+                )
+        return _pool
+
+
+def _discard_pool(pool: Executor):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def scan_page_async(url: str, html: str, follow_contact: bool) -> PageScan:
+    pool = parse_pool()
+    if pool is not None:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, scan_page, url, html, follow_contact)
+        except BrokenProcessPool:
+            logger.warning("[Parse] Worker process died; restarting the parse pool")
+            _discard_pool(pool)
+    return await asyncio.to_thread(scan_page, url, html, follow_contact)
@@ -0,0 +1,133 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from scraper import http_client
+from scraper.logging_config import logger
+from scraper.scraper_config import HOST_RATE_LIMITS, RATE_LIMIT_RETRIES
+
+THROTTLE_STATUSES = (429, 503)
+
+
+class HostRateLimiter:
+    """
+    Token bucket for one host, with AIMD rate adaptation.
+
+    Each caller reserves the next free send slot under a lock (so waiting callers are
+    served in arrival order) and sleeps outside the lock until that slot, plus a little
+    jitter so threads don't fire in lockstep. Successful responses nudge the rate up
+    additively; 429/503 halve it and honour Retry-After.
+    """
+
+    def __init__(self, host: str, rate: float, burst: int = 1, min_rate: float = 0.05,
+                 max_rate: float | None = None, increase: float = 0.05, decrease: float = 0.5,
+                 jitter: float = 0.25):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate * 2
+        self.increase = increase
+        self.decrease = decrease
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._tat = 0.0            # theoretical arrival time of the next request
+        self._blocked_until = 0.0
+        self.stats = {"requests": 0, "throttled": 0, "waited": 0.0}
+
+    def _reserve(self) -> float:
+        """Book the next slot and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            interval = 1.0 / self.rate
+            start = max(self._tat, now, self._blocked_until)
+            # Up to `burst` requests may go out back to back before spacing kicks in
+            wait = max(0.0, start - (self.burst - 1) * interval - now)
+            wait = max(wait, self._blocked_until - now)
+            self._tat = start + interval
+            wait += random.uniform(0, self.jitter * interval)
+            self.stats["requests"] += 1
+            self.stats["waited"] += wait
+            return wait
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record(self, status: int, retry_after: str | None = None):
+        with self._lock:
+            if status in THROTTLE_STATUSES:
+                self.stats["throttled"] += 1
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                delay = _parse_retry_after(retry_after)
+                if delay:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+                logger.info(f"[RateLimit] {self.host} returned {status}; rate now {self.rate:.2f}/s")
+            elif status < 500:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateScheduler:
+    """Hands out the limiter for a URL's host; hosts without a budget are never throttled."""
+
+    def __init__(self, limits: dict):
+        self.limits = limits
+        self._limiters: dict[str, HostRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter_for(self, url: str) -> HostRateLimiter | None:
+        host = urlparse(url).netloc.lower()
+        key = next((k for k in self.limits if host == k or host.endswith("." + k)), None)
+        if key is None:
+            return None
+        with self._lock:
+            if key not in self._limiters:
+                self._limiters[key] = HostRateLimiter(key, **self.limits[key])
+            return self._limiters[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {k: {**lim.stats, "rate": lim.rate} for k, lim in self._limiters.items()}
+
+
+scheduler = RateScheduler(HOST_RATE_LIMITS)
+
+
+def throttled_get(url: str, retries: int = RATE_LIMIT_RETRIES, **kwargs):
+    """
+    http_client.get that waits for the host's budget and backs off on 429/503.
+    Throttled hosts go through http_client.throttled_session, which doesn't retry
+    on status, so every 429/503 is seen (and paced) by the host's limiter.
+    """
+    limiter = scheduler.limiter_for(url)
+    if limiter is None:
+        return http_client.get(url, **kwargs)
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        r = http_client.throttled_session.get(url, **kwargs)
+        limiter.record(r.status_code, r.headers.get("Retry-After"))
+        if r.status_code not in THROTTLE_STATUSES:
+            break
+    return r
@@ -0,0 +1,132 @@
+from types import MappingProxyType
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import us
+    US_AVAILABLE = True
+except ImportError:
+    US_AVAILABLE = False
+
+try:
+    import pycountry
+    PYCOUNTRY_AVAILABLE = True
+except ImportError:
+    PYCOUNTRY_AVAILABLE = False
+
+US_STATE_REGIONS = {
+    "NA Northeast": (
+        "Connecticut", "Maine", "Massachusetts", "New Hampshire",
+        "Rhode Island", "Vermont", "New Jersey", "New York", "Pennsylvania",
+    ),
+    "NA Midwest": (
+        "Illinois", "Indiana", "Michigan", "Ohio", "Wisconsin",
+        "Iowa", "Kansas", "Minnesota", "Missouri", "Nebraska",
+        "North Dakota", "South Dakota",
+    ),
+    "NA South": (
+        "Delaware", "Florida", "Georgia", "Maryland", "North Carolina",
+        "South Carolina", "Virginia", "District of Columbia", "West Virginia",
+        "Alabama", "Kentucky", "Mississippi", "Tennessee",
+        "Arkansas", "Louisiana", "Oklahoma", "Texas",
+    ),
+    "NA West": (
+        "Arizona", "Colorado", "Idaho", "Montana", "Nevada",
+        "New Mexico", "Utah", "Wyoming",
+        "Alaska", "California", "Hawaii", "Oregon", "Washington",
+    ),
+}
+
+# (alpha-2 code, spellings besides pycountry's names and codes)
+COUNTRY_GROUPS = {
+    "EU": (
+        ("DE", "Germany"), ("FR", "France"), ("IT", "Italy"), ("ES", "Spain"),
+        ("NL", "Netherlands", "Holland"), ("BE", "Belgium"), ("AT", "Austria"),
+        ("CH", "Switzerland"), ("SE", "Sweden"), ("DK", "Denmark"), ("NO", "Norway"),
+        ("FI", "Finland"), ("PL", "Poland"),
+        ("GB", "United Kingdom", "UK", "Great Britain", "England", "Scotland", "Wales", "Northern Ireland"),
+        ("IE", "Ireland"), ("PT", "Portugal"), ("GR", "Greece"), ("CZ", "Czech Republic"),
+    ),
+    "APAC": (
+        ("JP", "Japan"), ("CN", "China"), ("KR", "South Korea"), ("SG", "Singapore"),
+        ("AU", "Australia"), ("IN", "India"), ("TW", "Taiwan"), ("HK", "Hong Kong"),
+        ("TH", "Thailand"), ("MY", "Malaysia"), ("PH", "Philippines"), ("ID", "Indonesia"),
+    ),
+}
+
+US_NAMES = ("US", "United States", "USA", "United States of America")
+
+
+def region_key(text: Optional[str]) -> str:
+    """Casefolded, dots dropped, whitespace collapsed: " U.S.A. " -> "usa"."""
+    return " ".join(str(text).casefold().replace(".", "").split()) if text is not None else ""
+
+
+def _country_spellings(alpha_2, *extra):
+    names = set(extra) | {alpha_2}
+    if PYCOUNTRY_AVAILABLE:
+        c = pycountry.countries.get(alpha_2=alpha_2)
+        if c:
+            names |= {c.alpha_3, c.name} | {getattr(c, a) for a in ("official_name", "common_name") if hasattr(c, a)}
+    return names
+
+
+def _build_region_tables():
+    # None marks the US: the region then depends on the state
+    by_country = {"multinational": "Multinational"}
+    for name in _country_spellings(*US_NAMES):
+        by_country[region_key(name)] = None
+    for region, countries in COUNTRY_GROUPS.items():
+        for alpha_2, *names in countries:
+            for name in _country_spellings(alpha_2, *names):
+                by_country[region_key(name)] = region
+
+    by_state = {}
+    abbrs = {s.name: s.abbr for s in [*us.states.STATES, us.states.DC]} if US_AVAILABLE else {}
+    for region, states in US_STATE_REGIONS.items():
+        for state in states:
+            by_state[region_key(state)] = region
+            if state in abbrs:
+                by_state[region_key(abbrs[state])] = region
+    return MappingProxyType(by_country), MappingProxyType(by_state)
+
+
+REGION_BY_COUNTRY, US_REGION_BY_STATE = _build_region_tables()
+
+
+def assign_region(country: Optional[str], state: Optional[str]) -> str:
+    """Map (country, state) to one of: 'NA Northeast', 'NA Midwest', 'NA South', 'NA West', 'EU', 'APAC', 'Multinational' or 'Other'."""
+    if not country:
+        return "Other"
+    region = REGION_BY_COUNTRY.get(region_key(country), "Other")
+    if region is None:
+        return US_REGION_BY_STATE.get(region_key(state), "Other")
+    return region
+
+
+def _lookup_column(values, table, default):
+    """table[region_key(v)] for every value of a column, looking up each distinct value once."""
+    codes, uniques = pd.factorize(values)
+    mapped = [table.get(region_key(v), default) if isinstance(v, str) else default for v in uniques]
+    # factorize codes missing values as -1, which picks the trailing default
+    return np.array(mapped + [default], dtype=object).take(codes)
+
+
+def assign_region_series(
+    country: pd.Series, state: pd.Series | None = None, missing_state: Optional[str] = "Other",
+) -> pd.Series:
+    """
+    assign_region over whole Country/State columns at once. US rows with no state
+    get missing_state ("Other", as assign_region gives; None leaves them open).
+    """
+    by_country = _lookup_column(country, REGION_BY_COUNTRY, "Other")
+    is_us = pd.isna(by_country)
+    if state is not None and is_us.any():
+        by_state = _lookup_column(state, US_REGION_BY_STATE, "Other")
+        no_state = pd.isna(state).to_numpy() | (state.astype(str).str.strip() == "").to_numpy()
+        by_state = np.where(no_state, missing_state, by_state)
+    else:
+        by_state = np.full(len(country), missing_state, dtype=object)
+    return pd.Series(np.where(is_us, by_state, by_country), index=country.index, dtype=object)
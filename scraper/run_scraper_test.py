@@ -9,7 +9,7 @@ from company_processor import (
     fetch_page_with_playwright
 )
 from location_utils import parse_contact_page, assign_region
-from bs4 import BeautifulSoup
+from page_analysis import PageAnalysis
 
 def normalize_domain(url):
     try:
@@ -101,15 +101,12 @@ def _process_location_row(row):
             print("  🏠 Using homepage for location scan")
             html_content, soup_to_parse = homepage_html, soup_home
 
-        body_lines = [ln.strip() for ln in soup_to_parse.get_text(separator="\n").split("\n") if ln.strip()]
-        country, state = parse_contact_page(soup_to_parse, html_content, body_lines)
+        country, state = parse_contact_page(PageAnalysis.from_soup(soup_to_parse, contact_link or known_url))
 
         if not country and contact_link:
             print("  🧭 Retrying with Playwright…")
             rendered = fetch_page_with_playwright(contact_link)
-            soup_r = BeautifulSoup(rendered, "html.parser")
-            lines_r = [ln.strip() for ln in soup_r.get_text(separator="\n").split("\n") if ln.strip()]
-            country, state = parse_contact_page(soup_r, rendered, lines_r)
+            country, state = parse_contact_page(PageAnalysis(contact_link, rendered))
             if country:
                 print(f"  🎉 Playwright parsed: country={country}, state={state}")
 
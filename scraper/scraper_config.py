@@ -1,3 +1,5 @@
+import os
+
 FAKE_CHROME_HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -35,3 +37,77 @@ ACQUISITION_MAP = {
     "Seagen": "Pfizer",
     "Neogene Therapeutics": "Illumina",
 }
+
+# Persistent enrichment cache (see scraper/enrichment_cache.py)
+CACHE_PATH = os.getenv("ENRICHMENT_CACHE_PATH", os.path.join(".cache", "enrichment.sqlite"))
+CACHE_MAX_ENTRIES = int(os.getenv("ENRICHMENT_CACHE_MAX_ENTRIES", "50000"))
+CACHE_TTL_SECONDS = 30 * 24 * 3600        # found websites/locations rarely change
+CACHE_NEGATIVE_TTL_SECONDS = 3 * 24 * 3600  # retry misses sooner
+
+# HTTP response cache for page fetches (see scraper/http_cache.py)
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE", "1") != "0"
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", os.path.join(".cache", "http.sqlite"))
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "20000"))
+# Responses are reused without asking the server for at least this long, unless
+# Cache-Control says no-cache/no-store; after that they're revalidated (usually a 304)
+HTTP_CACHE_MIN_FRESH_SECONDS = int(os.getenv("HTTP_CACHE_MIN_FRESH_SECONDS", str(24 * 3600)))
+HTTP_CACHE_MAX_BODY_BYTES = 5 * 1024 * 1024
+
+# Offline place table for location fallback (see scraper/gazetteer.py); built on first use
+GAZETTEER_PATH = os.getenv("SCRAPER_GAZETTEER_PATH", os.path.join(".cache", "gazetteer"))
+
+# Shared Playwright browser (see scraper/browser_pool.py)
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "4"))   # concurrent open pages
+BROWSER_CONTEXTS = 2
+BROWSER_PAGES_PER_CONTEXT = 50    # recycle a context after this many pages
+BROWSER_READY_TIMEOUT_MS = 3000   # max wait for network idle after DOMContentLoaded
+
+# Async scrape pipeline (see scraper/async_processor.py)
+ASYNC_MAX_COMPANIES = 50          # companies processed concurrently
+ASYNC_TOTAL_CONNECTIONS = 100
+ASYNC_HOST_LIMIT = 4              # concurrent requests per host
+ASYNC_HOST_LIMITS = {"www.bing.com": 3}
+
+# Domain guessing in get_bing_soup
+DOMAIN_PROBE_WORKERS = 8   # guessed domains probed concurrently
+SITE_QUERY_BATCH = 4       # guessed domains OR-ed into one forced site: query
+
+# Website verification streams the page and stops at the first name token (see verify_website_fast)
+VERIFY_CHUNK_BYTES = 16 * 1024
+VERIFY_MAX_BYTES = int(os.getenv("SCRAPER_VERIFY_MAX_BYTES", str(2 * 1024 * 1024)))   # give up past this much HTML
+
+# Shared requests session (see scraper/http_client.py)
+HTTP_POOL_CONNECTIONS = 100   # hosts kept in the pool manager
+HTTP_POOL_MAXSIZE = 16        # keep-alive connections per host; >= concurrent workers
+HTTP_RETRIES = 2
+HTTP_BACKOFF_FACTOR = 0.5
+
+# BeautifulSoup parser for fetched pages; "lxml" is faster if installed
+HTML_PARSER = os.getenv("SCRAPER_HTML_PARSER", "html.parser")
+
+# Processes parsing fetched pages for locations (see scraper/parse_pool.py); 0 parses on threads
+LOCATION_PARSE_WORKERS = int(os.getenv("SCRAPER_PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+# Per-host request budgets (see scraper/rate_limiter.py); other hosts are unthrottled
+HOST_RATE_LIMITS = {
+    "bing.com": {"rate": 1.0, "burst": 2, "min_rate": 0.1, "max_rate": 3.0},
+}
+RATE_LIMIT_RETRIES = 2   # extra attempts after a 429/503
+
+# Employee-count sources (see scraper/employee_resolver.py); lower priority wins
+EMPLOYEE_SOURCES = {
+    "wikidata": {"priority": 0, "timeout": 15},
+    "wikipedia": {"priority": 1, "timeout": 15},
+    "search": {"priority": 2, "timeout": 30},   # four throttled Bing queries
+    "site": {"priority": 3, "timeout": 45},     # Bing domain lookup, then up to five pages
+}
+EMPLOYEE_RESOLVER_WORKERS = 16
+
+# Enrichment stages run by default (see scraper/enrichment_pipeline.py)
+ENRICH_STAGES = ["website", "location", "employees"]
+# Companies resolving employee counts at once; more would queue sources behind the resolver's pool
+EMPLOYEE_STAGE_CONCURRENCY = max(1, EMPLOYEE_RESOLVER_WORKERS // len(EMPLOYEE_SOURCES))
+
+# Wikidata employee counts: labels resolved per SPARQL query (VALUES block)
+WIKIDATA_SPARQL_ENDPOINT = "https://query.wikidata.org/sparql"
+WIKIDATA_BATCH_SIZE = 200
@@ -0,0 +1,31 @@
+"""TokenScanner over chunked bodies."""
+from scraper.bing_search import TokenScanner
+
+
+def scan(chunks, tokens):
+    scanner = TokenScanner(tokens)
+    for chunk in chunks:
+        tok = scanner.feed(chunk)
+        if tok:
+            return tok
+    return scanner.feed(b"", final=True)
+
+
+def test_token_split_across_chunks_shorter_than_carry():
+    assert scan([b"xa", b"c", b"me"], {"acme"}) == "acme"
+    assert scan([b"<p>bio", b"te", b"c", b"h", b"nol", b"ogy</p>"], {"biotechnology", "pharma"}) == "biotechnology"
+
+
+def test_token_split_into_single_bytes():
+    body = b"Our ACME labs do Biotech research"
+    assert scan([body[i:i + 1] for i in range(len(body))], {"biotech"}) == "biotech"
+
+
+def test_multibyte_character_split_across_chunks():
+    body = "Société de biotechnologie".encode("utf-8")
+    assert scan([body[i:i + 2] for i in range(0, len(body), 2)], {"société"}) == "société"
+
+
+def test_no_match():
+    assert scan([b"ac", b"m", b"x", b"e"], {"acme"}) is None
+    assert scan([], {"acme"}) is None
@@ -0,0 +1,122 @@
+"""page_has_tokens(_async) against a local server, through a scratch HTTP cache."""
+import asyncio
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scraper import async_processor, bing_search
+from scraper.async_processor import AsyncHttpClient, page_has_tokens_async
+from scraper.bing_search import page_has_tokens
+from scraper.http_cache import HttpCache
+
+TOKENS = {"acmebio", "acme"}
+FILLER = b"<p>" + b"x" * 200_000 + b"</p>"
+
+# path -> (extra headers, body)
+PAGES = {
+    "/home": ({"ETag": '"h1"'}, b"<title>ACME Bio</title>" + FILLER),
+    "/revalidate": ({"ETag": '"r1"', "Cache-Control": "no-cache"}, b"<title>ACME Bio</title>" + FILLER),
+    "/big": ({}, b"<title>ACME Bio</title>" + b"x" * 2_000_000),
+    "/nostore": ({"Cache-Control": "no-store"}, b"<title>ACME Bio</title>" + FILLER),
+    "/none": ({}, b"<p>nothing here</p>"),
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        headers, body = PAGES[self.path]
+        self.server.hits[self.path] += 1
+        if headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]:
+            self.server.not_modified[self.path] += 1
+            self.send_response(304)
+            self.send_header("ETag", headers["ETag"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            for i in range(0, len(body), 65536):
+                self.wfile.write(body[i:i + 65536])
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.hits, srv.not_modified = Counter(), Counter()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    srv.base = f"http://127.0.0.1:{srv.server_port}"
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = HttpCache(str(tmp_path / "http.sqlite"), max_body_bytes=1_000_000)
+    for module in (bing_search, async_processor):
+        monkeypatch.setattr(module, "http_cache", cache)
+        monkeypatch.setattr(module, "HTTP_CACHE_ENABLED", True)
+    return cache
+
+
+def async_page_has_tokens(url):
+    async def go():
+        async with AsyncHttpClient() as client:
+            return await page_has_tokens_async(client, url, TOKENS)
+    return asyncio.run(go())
+
+
+@pytest.fixture(params=["sync", "async"])
+def check(request):
+    return (lambda url: page_has_tokens(url, TOKENS)) if request.param == "sync" else async_page_has_tokens
+
+
+def test_verified_page_is_stored_and_reused(server, cache, check):
+    url = server.base + "/home"
+    assert check(url) == "acme"
+
+    # Read past the match to the end, so the body is cached for location parsing
+    entry = cache.lookup(url)
+    assert entry.fresh and entry.body == PAGES["/home"][1]
+    assert check(url) == "acme"
+    assert server.hits["/home"] == 1
+    assert cache.stats()["fresh_hits"] == 1
+
+
+def test_stale_entry_is_revalidated_and_scanned_on_304(server, cache, check):
+    url = server.base + "/revalidate"
+    cache.min_fresh = 0
+    assert check(url) == "acme"
+    assert not cache.lookup(url).fresh
+
+    assert check(url) == "acme"
+    assert (server.hits["/revalidate"], server.not_modified["/revalidate"]) == (2, 1)
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_uncacheable_pages_stop_at_the_match(server, cache, check):
+    for path in ("/big", "/nostore"):
+        assert check(server.base + path) == "acme"
+        assert cache.lookup(server.base + path) is None
+    assert cache.stats()["stored"] == 0
+
+
+def test_page_without_tokens_is_stored(server, cache, check):
+    url = server.base + "/none"
+    assert check(url) == ""
+    assert check(url) == ""
+    assert server.hits["/none"] == 1
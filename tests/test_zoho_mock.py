@@ -0,0 +1,119 @@
+"""zoho_api against the local zoho_mock server."""
+import pytest
+
+from scraper.rate_limiter import HostRateLimiter
+from zoho_api import ZOHO_API_VERSION, ZOHO_BULK_VERSION, ZohoStore, sync_module, write_back
+from zoho_mock import MockZoho
+
+RECORDS_ROUTE = ("GET", f"/crm/{ZOHO_API_VERSION}/Accounts")
+
+
+@pytest.fixture
+def mock():
+    with MockZoho() as m:
+        yield m
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ZohoStore(str(tmp_path / "zoho.sqlite"))
+
+
+def newest_modified(records):
+    return max(r["Modified_Time"] for r in records)
+
+
+def fast_limiter():
+    return HostRateLimiter("zoho-test", rate=1000.0, burst=1000, jitter=0.0)
+
+
+def test_iter_pages_follows_page_token_past_2000(mock):
+    seeded = mock.seed_accounts(2450)
+    pages = list(mock.client().iter_pages("Accounts"))
+
+    # The mock rejects plain page numbers past 2,000 records, so getting here means page_token was used
+    assert [len(p) for p in pages] == [200] * 12 + [50]
+    assert [r["id"] for p in pages for r in p] == [r["id"] for r in seeded]
+    assert mock.counts[RECORDS_ROUTE] == 13
+
+
+def test_sync_module_fetches_only_changes_and_drops_deletes(mock, store):
+    seeded = mock.seed_accounts(300)
+    client = mock.client()
+
+    first = sync_module(client, store, "Accounts")
+    assert (first["since"], first["fetched"], first["deleted"]) == (None, 300, 0)
+    synced_up_to = newest_modified(seeded)
+    assert store.last_modified("Accounts") == synced_up_to
+
+    mock.update_record("Accounts", seeded[0]["id"], Website="changed.com")
+    added = mock.add_records("Accounts", [{"Account_Name": "New Bio"}])[0]
+    mock.delete_record("Accounts", seeded[1]["id"])
+
+    second = sync_module(client, store, "Accounts")
+    assert second["since"] == synced_up_to
+    assert (second["fetched"], second["deleted"]) == (2, 1)
+    by_id = {r["id"]: r for r in store.records("Accounts")}
+    assert len(by_id) == 300
+    assert by_id[seeded[0]["id"]]["Website"] == "changed.com"
+    assert added["id"] in by_id and seeded[1]["id"] not in by_id
+
+    # Nothing modified since: the records call comes back 304 and the store is unchanged
+    third = sync_module(client, store, "Accounts")
+    assert third["fetched"] == 0
+    assert len(store.records("Accounts")) == 300
+
+
+def test_bulk_read_pages_through_jobs(tmp_path):
+    with MockZoho(bulk_page_size=200, bulk_polls_until_done=2) as mock:
+        seeded = mock.seed_accounts(450)
+        df = mock.client().bulk_read("Accounts", fields=["Account_Name", "Website"], poll_interval=0)
+
+        assert len(df) == 450
+        assert list(df.columns) == ["Id", "Modified_Time", "Account_Name", "Website"]
+        assert list(df["Id"]) == [r["id"] for r in seeded]
+        assert mock.counts[("POST", f"/crm/bulk/{ZOHO_BULK_VERSION}/read")] == 3
+
+        # A first bulk sync seeds the store, after which syncs are incremental again.
+        # sync_module polls at the default interval, so have jobs finish on the first poll.
+        mock.bulk_polls_until_done = 0
+        store = ZohoStore(str(tmp_path / "zoho.sqlite"))
+        assert sync_module(mock.client(), store, "Accounts", ["Account_Name"], bulk=True)["fetched"] == 450
+        assert store.last_modified("Accounts") == newest_modified(seeded)
+
+
+def test_write_back_batches_and_skips_unchanged_rows(mock, store):
+    seeded = mock.seed_accounts(250)
+    client = mock.client()
+    sync_module(client, store, "Accounts")
+    rows = [{"id": r["id"], "Rank": i % 4, "Website": r["Website"], "Region": r["Region"]}
+            for i, r in enumerate(seeded)]
+
+    report = write_back(client, "Accounts", rows, store=store, batch_size=100, limiter=fast_limiter())
+    assert (report["changed"], report["written"], report["calls"], report["failed"]) == (250, 250, 3, [])
+    assert sorted(mock.upsert_batches) == [50, 100, 100]
+    assert mock.modules["Accounts"][seeded[7]["id"]]["Ranking_Score"] == 3
+
+    # Written values were merged into the store, so an identical rerun sends nothing
+    again = write_back(client, "Accounts", rows, store=store, limiter=fast_limiter())
+    assert (again["unchanged"], again["changed"], again["calls"]) == (250, 0, 0)
+
+    rows[0]["Rank"] = 9
+    third = write_back(client, "Accounts", rows, store=store, limiter=fast_limiter())
+    assert (third["unchanged"], third["written"], third["calls"]) == (249, 1, 1)
+
+
+def test_write_back_retries_transient_failures_and_reports_invalid(store):
+    with MockZoho(flaky_rate=0.3, seed=1) as mock:
+        seeded = mock.seed_accounts(120)
+        invalid = seeded[5]["id"]
+        mock.invalid_ids.add(invalid)
+        rows = [{"id": r["id"], "Rank": 1} for r in seeded]
+
+        report = write_back(mock.client(), "Accounts", rows, batch_size=50, retries=10, limiter=fast_limiter())
+
+        # Transient INTERNAL_ERRORs are re-sent in later rounds; the invalid record fails once and is reported
+        assert report["written"] == 119
+        assert [(f["id"], f["code"]) for f in report["failed"]] == [(invalid, "INVALID_DATA")]
+        assert report["calls"] > 3
+        assert all(mock.modules["Accounts"][r["id"]].get("Ranking_Score") == 1 for r in seeded if r["id"] != invalid)
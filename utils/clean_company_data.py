@@ -1,17 +1,135 @@
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+from scraper.regions import assign_region_series
+
+MISSING_SENTINELS = ["", "nan", "na", "<na>"]
+CATEGORY_COLUMNS = ["Region", "Funding Stage", "Major Segment"]
+PREPROCESS_CHUNK_ROWS = 50_000
+# Address columns Region can be derived from, in order of preference
+COUNTRY_COLUMNS = ["Country", "Billing Country", "Shipping Country"]
+STATE_COLUMNS = ["State", "Billing State", "Shipping State"]
 
 def normalize_missing(val):
     """Convert empty strings and pandas NA to Python None."""
-    if pd.isna(val) or str(val).strip().lower() in ["", "nan", "na", "<na>"]:
+    if pd.isna(val) or str(val).strip().lower() in MISSING_SENTINELS:
         return None
     return str(val).strip()
 
 
-def preprocess_df(path):
+def normalize_missing_column(values):
+    """Vectorized normalize_missing for a column of strings; each distinct value is cleaned once."""
+    codes, uniques = pd.factorize(values)
+    stripped = pd.Series(uniques, dtype=object).str.strip()
+    missing = stripped.isna() | stripped.str.lower().isin(MISSING_SENTINELS)
+    cleaned = np.append(stripped.where(~missing, None).to_numpy(), None)
+    # factorize codes NaN as -1, which picks the trailing None
+    return pd.Series(cleaned.take(codes), index=values.index, dtype=object)
+
+
+def _unseen(hashes, seen):
+    """Mask of hashes in neither `seen` (sorted) nor earlier in this chunk."""
+    pos = np.searchsorted(seen, hashes).clip(max=max(len(seen) - 1, 0))
+    in_seen = seen[pos] == hashes if len(seen) else np.zeros(len(hashes), dtype=bool)
+    return ~in_seen & ~pd.Series(hashes).duplicated().to_numpy()
+
+
+def iter_preprocessed_chunks(path, chunksize=PREPROCESS_CHUNK_ROWS):
+    """
+    Yield cleaned chunks of a Zoho export without loading the whole file.
+
+    Every cell is read as text so a row's hash doesn't depend on the dtypes pandas
+    happens to infer for its chunk; duplicates are dropped across chunks by keeping
+    a sorted array of the 64-bit hashes of the raw rows seen so far (8 bytes per unique
+    row). CATEGORY_COLUMNS come back as categoricals (with NaN, not None, for missing values).
+    """
+    seen = np.empty(0, dtype="uint64")
+    for chunk in pd.read_csv(path, encoding="ISO-8859-1", dtype=str, chunksize=chunksize):
+        chunk.columns = chunk.columns.str.strip()
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        keep = _unseen(hashes, seen)
+        # Both inputs are sorted, so the stable sort is a single linear merge
+        seen = np.sort(np.concatenate([seen, np.sort(hashes[keep])]), kind="stable")
+        chunk = chunk[keep]
+        for col in chunk.columns:
+            chunk[col] = normalize_missing_column(chunk[col])
+            if col in CATEGORY_COLUMNS:
+                chunk[col] = chunk[col].astype("category")
+        yield chunk
+
+
+def _infer_numeric(values):
+    """Numeric version of a text column if every present value parses, as read_csv would infer."""
+    try:
+        return pd.to_numeric(values)
+    except (ValueError, TypeError):
+        return values
+
+
+def backfill_region(df):
+    """
+    Fill in Region for rows that lack one but have a Country (and, for the US, a
+    State), so those accounts don't need scraping. Rows without a country, and US
+    rows without a state, are left empty for the location stage to fill.
+    """
+    country_col = next((c for c in COUNTRY_COLUMNS if c in df.columns), None)
+    if country_col is None:
+        return df
+    state_col = next((c for c in STATE_COLUMNS if c in df.columns), None)
+    region = df["Region"] if "Region" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    fill = region.isna() & df[country_col].notna()
+    if not fill.any():
+        return df
+    derived = assign_region_series(
+        df.loc[fill, country_col], df.loc[fill, state_col] if state_col else None, missing_state=None,
+    )
+    filled = region.astype(object).where(~fill, derived)
+    df["Region"] = filled.astype("category") if isinstance(region.dtype, pd.CategoricalDtype) else filled
+    return df
+
+
+def infer_numeric_columns(df):
+    """_infer_numeric on every column except CATEGORY_COLUMNS, in place."""
+    for col in df.columns:
+        if col not in CATEGORY_COLUMNS:
+            df[col] = _infer_numeric(df[col])
+    return df
+
+
+def preprocess_df(path, chunksize=None):
+    """
+    Cleaned, de-duplicated Zoho export as one DataFrame. With chunksize the file is
+    read and cleaned in chunks, but the result is still the whole file; callers
+    that can work chunk by chunk should iterate iter_preprocessed_chunks instead.
+    """
+    if chunksize:
+        return backfill_region(_preprocess_chunked(path, chunksize))
     df = pd.read_csv(path, encoding="ISO-8859-1")
     df.columns = df.columns.str.strip()
     df.drop_duplicates(inplace=True)
     for col in df.select_dtypes(include=['object']):
         df[col] = df[col].map(normalize_missing)
     df = df.where(pd.notna(df), None)
-    return df
+    return backfill_region(df)
+
+
+def _preprocess_chunked(path, chunksize):
+    chunks = list(iter_preprocessed_chunks(path, chunksize))
+    if not chunks:
+        return pd.DataFrame()
+    columns = list(chunks[0].columns)
+    categorical = [c for c in columns if c in CATEGORY_COLUMNS]
+    # Chunks carry different category sets, which pd.concat would silently turn back into object
+    cats = {c: union_categoricals([chunk[c] for chunk in chunks]) for c in categorical}
+    df = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    del chunks
+    infer_numeric_columns(df)
+    for col, values in cats.items():
+        df[col] = values
+    return df[columns]
+
+
+def to_records(df):
+    """Row dicts with every missing value as None, whatever the column's dtype."""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
@@ -0,0 +1,97 @@
+import hashlib
+import io
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from openpyxl import Workbook
+
+# Zoho has no field for these, so they're left out of anything meant to be re-imported
+NON_ZOHO_COLUMNS = ["Rank", "Error"]
+
+
+def zoho_columns(df):
+    return df.drop(columns=[c for c in NON_ZOHO_COLUMNS if c in df.columns])
+
+
+def frame_hash(df):
+    """Content hash of a DataFrame (values, index and column names)."""
+    h = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    h.update(repr(list(df.columns)).encode())
+    return h.hexdigest()
+
+
+def _cell(val):
+    if val is None or (isinstance(val, float) and math.isnan(val)) or val is pd.NA or val is pd.NaT:
+        return None
+    return val.item() if isinstance(val, np.generic) else val
+
+
+def write_xlsx(df, f):
+    """openpyxl in write-only mode: rows are streamed to the zip as they're appended."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append([str(c) for c in df.columns])
+    for row in df.itertuples(index=False, name=None):
+        ws.append([_cell(v) for v in row])
+    wb.save(f)
+
+
+def write_csv(df, f):
+    df.to_csv(f, index=False, encoding="utf-8")
+
+
+def write_parquet(df, f):
+    # pyarrow refuses object columns that mix types (e.g. scraped ints next to strings)
+    df = df.copy()
+    for col in df.select_dtypes(include=["object"]):
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    df.to_parquet(f, index=False)
+
+
+# format: (label, file extension, MIME type, writer)
+EXPORT_FORMATS = {
+    "xlsx": ("Excel (.xlsx)", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", write_xlsx),
+    "csv": ("CSV for Zoho import", "csv", "text/csv", write_csv),
+    "parquet": ("Parquet", "parquet", "application/octet-stream", write_parquet),
+}
+
+
+def write_export(df, fmt, f):
+    EXPORT_FORMATS[fmt][3](df, f)
+
+
+@st.cache_data(max_entries=8, show_spinner="Preparing export...")
+def export_bytes(data_key, fmt, _build_df):
+    buffer = io.BytesIO()
+    write_export(zoho_columns(_build_df()), fmt, buffer)
+    return buffer.getvalue()
+
+
+def show_export(build_df, data_key, file_stem, key_prefix):
+    """
+    Format picker plus download button. The file is only built once the user asks
+    for it, and is cached per (data_key, format); build_df is only called on a cache miss.
+    """
+    fmt = st.radio(
+        "Export format",
+        list(EXPORT_FORMATS),
+        format_func=lambda f: EXPORT_FORMATS[f][0],
+        horizontal=True,
+        key=f"{key_prefix}_export_format",
+    )
+    requested = st.session_state.setdefault(f"{key_prefix}_export_requested", set())
+    if (data_key, fmt) not in requested:
+        if not st.button("📦 Prepare download", key=f"{key_prefix}_export_prepare"):
+            return
+        requested.add((data_key, fmt))
+
+    _, ext, mime, _ = EXPORT_FORMATS[fmt]
+    st.download_button(
+        "⬇️ Download",
+        export_bytes(data_key, fmt, build_df),
+        f"{file_stem}.{ext}",
+        mime=mime,
+        key=f"{key_prefix}_download_button",
+    )
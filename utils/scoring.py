@@ -1,3 +1,4 @@
+import numpy as np
 import streamlit as st
 import pandas as pd
 
@@ -49,6 +50,95 @@ def compute_score(row, config):
 
     return score
 
+_INT_LITERAL = r"[+-]?\d+(?:_\d+)*"
+
+def parse_employees(values):
+    """Column version of the int() parse in compute_score: NaN wherever int() would fail."""
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+        nums = values.astype("float64")
+    else:
+        nums = pd.to_numeric(values, errors="coerce").astype("float64")
+        is_text = values.apply(isinstance, args=(str,))
+        if is_text.any():
+            # int() only accepts integer literals, so "12.5" or "1,000" must not count
+            text = values[is_text].str.strip()
+            text = text.where(text.str.fullmatch(_INT_LITERAL, na=False)).str.replace("_", "", regex=False)
+            nums[is_text] = pd.to_numeric(text, errors="coerce")
+    nums = nums.where(np.isfinite(nums))
+    return np.trunc(nums)
+
+def _column(df, name):
+    if name in df.columns:
+        return df[name]
+    return pd.Series("", index=df.index, dtype=object)
+
+def _matches_one(values, selected):
+    return values.eq(selected)
+
+def match_masks(df, config, employees=None):
+    """
+    Boolean match column per criterion, mirroring the checks in compute_score.
+    `employees` can be a parse_employees result reused across calls on the same df.
+    """
+    emp = parse_employees(_column(df, "Employees")) if employees is None else employees
+    region = _column(df, "Region")
+    funding = _column(df, "Funding Stage")
+    segment = _column(df, "Major Segment")
+    threshold = config.get("threshold", 100)
+
+    if config["mode"] == "point":
+        none = pd.Series(False, index=df.index)
+        return {
+            "employee": emp.notna() & (emp < threshold) if config.get("employee") else none,
+            "region": _matches_one(region, config["selected_region"])
+            if config.get("region") and config.get("selected_region") else none,
+            "funding": _matches_one(funding, config["selected_funding"])
+            if config.get("funding") and config.get("selected_funding") else none,
+            "segment": _matches_one(segment, config["selected_segment"])
+            if config.get("segment") and config.get("selected_segment") else none,
+        }
+
+    return {
+        "employee": emp.notna() & (emp < threshold),
+        "region": region.isin(config.get("selected_regions", [])),
+        "funding": funding.isin(config.get("selected_funding", [])),
+        "segment": segment.isin(config.get("selected_segments", [])),
+    }
+
+def weighted_sum(masks, config):
+    """Add the per-criterion points in the same order compute_score does, so float sums agree exactly."""
+    if config["mode"] == "point":
+        weights = {name: 1 for name in masks}
+        score = np.zeros(len(masks["employee"]), dtype="int64")
+    else:
+        weights = {name: config.get(name, 0.0) for name in masks}
+        score = np.zeros(len(masks["employee"]), dtype="float64")
+    for name in ("employee", "region", "funding", "segment"):
+        score = score + np.where(masks[name].to_numpy(), weights[name], 0)
+    return pd.Series(score, index=masks["employee"].index)
+
+def mask_config(config):
+    """The part of a ranking config that match_masks reads; in weighted mode the weights only feed weighted_sum."""
+    if config["mode"] == "point":
+        return dict(config)
+    return {k: v for k, v in config.items() if k not in ("employee", "region", "funding", "segment")}
+
+def top_k(scores, k):
+    """Positions of the k highest scores, highest first, ties kept in row order (as a stable sort would)."""
+    values = scores.to_numpy()
+    n = len(values)
+    if k >= n:
+        return np.argsort(-values, kind="stable")
+    cutoff = np.partition(values, n - k)[n - k]
+    above = np.flatnonzero(values > cutoff)
+    ties = np.flatnonzero(values == cutoff)[:k - len(above)]
+    idx = np.sort(np.concatenate([above, ties]))
+    return idx[np.argsort(-values[idx], kind="stable")]
+
+def compute_scores(df, config):
+    """Vectorized compute_score over a whole DataFrame; returns a Series aligned to df.index."""
+    return weighted_sum(match_masks(df, config), config)
+
 def show_ranking_config(df, key_prefix="rank"):
     mode = st.radio(
         "Choose scoring mode:",
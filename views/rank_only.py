@@ -1,7 +1,27 @@
+import hashlib
 import io
+import json
+import numpy as np
 import pandas as pd
 import streamlit as st
-from utils.scoring import score_row, compute_score, show_ranking_config
+from utils.clean_company_data import backfill_region
+from utils.export import show_export
+from utils.scoring import mask_config, match_masks, parse_employees, show_ranking_config, top_k, weighted_sum
+
+PREVIEW_ROWS = 1000   # rows rendered in the uploaded/ranked tables; the export has all of them
+
+# Reruns share these objects instead of unpickling a copy each time, so they must not be mutated
+@st.cache_resource(max_entries=2, show_spinner="Reading file...")
+def load_accounts(file_hash, _data, name):
+    buf = io.BytesIO(_data)
+    df = pd.read_excel(buf) if name.endswith(".xlsx") else pd.read_csv(buf)
+    df.columns = df.columns.str.strip()
+    df = backfill_region(df)
+    return df, parse_employees(df["Employees"]) if "Employees" in df.columns else None
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def cached_masks(file_hash, criteria, _df, _employees):
+    return match_masks(_df, criteria, employees=_employees)
 
 def run_rank_only_tab():
     st.markdown("### Upload Pre-Filled Zoho Accounts Data")
@@ -13,9 +33,13 @@ def run_rank_only_tab():
     st.caption("💡 Tip: This mode is faster. You can upload large files because there's no scraping.")
 
     if static_file:
-        df = pd.read_excel(static_file) if static_file.name.endswith(".xlsx") else pd.read_csv(static_file)
+        data = static_file.getvalue()
+        file_hash = hashlib.sha1(data).hexdigest()
+        df, employees = load_accounts(file_hash, data, static_file.name)
         st.markdown("### 🔍 Uploaded Data")
-        st.dataframe(df)
+        st.dataframe(df.head(PREVIEW_ROWS))
+        if len(df) > PREVIEW_ROWS:
+            st.caption(f"Showing the first {PREVIEW_ROWS:,} of {len(df):,} rows.")
 
         st.markdown("### 🎯 Ranking Preferences")
         st.markdown("By default, companies are ranked using a **Point-Based System** with only employees < 100 having points.")
@@ -50,16 +74,21 @@ def run_rank_only_tab():
         with st.expander("⚙️ Customize Ranking System"):
             ranking_config = show_ranking_config(df, key_prefix="rank")
 
-        df["Rank"] = df.apply(lambda r: compute_score(r, ranking_config), axis=1)
-        df = df.sort_values("Rank", ascending=False)
+        # Only selection changes rebuild the masks; a weight change just re-sums them
+        masks = cached_masks(file_hash, mask_config(ranking_config), df, employees)
+        scores = weighted_sum(masks, ranking_config)
+        top = top_k(scores, PREVIEW_ROWS)
 
         st.markdown("### 🏆 Ranked Companies")
-        st.dataframe(df)
+        st.dataframe(df.iloc[top].assign(Rank=scores.iloc[top]))
+        if len(df) > PREVIEW_ROWS:
+            st.caption(f"Showing the top {PREVIEW_ROWS:,} of {len(df):,} companies; the export has all of them.")
 
         st.markdown("### 💾 Export Results")
         st.caption("The exported file does not include the 'Ranking' column so that you can easily re-import back to Zoho, since Zoho fields don't have a 'Ranking' column")
-        export_df = df.drop(columns=[c for c in ["Rank", "Error"] if c in df.columns])
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-            export_df.to_excel(writer, index=False)
-        st.download_button("⬇️ Download", buffer.getvalue(), "ranked_only_companies.xlsx")
\ No newline at end of file
+        show_export(
+            lambda: df.iloc[np.argsort(-scores.to_numpy(), kind="stable")],
+            data_key=f"{file_hash}:{json.dumps(ranking_config, sort_keys=True, default=str)}",
+            file_stem="ranked_only_companies",
+            key_prefix="rank",
+        )
\ No newline at end of file
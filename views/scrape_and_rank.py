@@ -1,10 +1,10 @@
-import io, time
+import time
 import pandas as pd
 import streamlit as st
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from utils.clean_company_data import preprocess_df
-from scraper.company_processor import process_company
-from utils.scoring import score_row, compute_score, show_ranking_config
+from utils.clean_company_data import PREPROCESS_CHUNK_ROWS, preprocess_df, to_records
+from scraper.enrichment_pipeline import EnrichmentPipeline, enrich_rows
+from utils.export import frame_hash, show_export
+from utils.scoring import compute_scores, show_ranking_config
 
 def run_scrape_and_rank_tab():
     st.markdown("### Upload Zoho Accounts Data")
@@ -14,7 +14,7 @@ def run_scrape_and_rank_tab():
         help="To export: Zoho > Accounts > Actions > Export Accounts. You only need to include 'Account Name'; other fields like 'Website', 'Region', 'Funding Stage', 'Employees', and 'Major Segment' are optional.",
         key="file_uploader"  # Add a key to prevent reprocessing
     )
-    st.caption("💡 Tip: This mode is slower. Keep batches in <30 companies to avoid bot detection and delays.")
+    st.caption("💡 Tip: This mode is slower. Companies are scraped concurrently; batches of a few hundred are fine, though very large batches may still trip bot detection.")
 
     # Only process new file if it's different from the stored one
     if uploaded_file:
@@ -25,7 +25,7 @@ def run_scrape_and_rank_tab():
             
             st.session_state.uploaded_file = uploaded_file
             st.session_state.uploaded_file_name = uploaded_file.name
-            st.session_state.df = preprocess_df(uploaded_file)
+            st.session_state.df = preprocess_df(uploaded_file, chunksize=PREPROCESS_CHUNK_ROWS)
             st.session_state.show_results = False
             # Clear previous results when new file is uploaded
             if "augmented_df" in st.session_state:
@@ -72,44 +72,35 @@ def run_scrape_and_rank_tab():
         
         # Only show the button if we don't have results yet
         if not st.session_state.get("show_results", False):
+            find_employees = st.checkbox(
+                "Also look up missing employee counts",
+                value=True,
+                key="scrape_find_employees",
+                help="Checks Wikidata, Wikipedia, search results and the company site. Adds noticeably to scrape time.",
+            )
             if st.button("🌐 Fill in Website + Region & Score Companies", key="process_button"):
                 start = time.time()
                 status = st.empty()
                 bar = st.progress(0)
-                results, error_log = [], []
-
-                def _process(row, i):
-                    try:
-                        company = row["Account Name"]
-                        url, region = row.get("Website"), row.get("Region")
-                        row_dict = row.to_dict() if hasattr(row, 'to_dict') else dict(row)
-                        
-                        if url and region:
-                            return row_dict
-                        
-                        info = process_company(company, scrape_website=not url, scrape_location=not region)
-                        return {**row_dict, "Website": info.get("url", url), "Region": info.get("region", region)}
-                    except Exception as e:
-                        error_log.append({"Index": i, "Company": row["Account Name"], "Error": str(e)})
-                        row_dict = row.to_dict() if hasattr(row, 'to_dict') else dict(row)
-                        return row_dict
-
-                with ThreadPoolExecutor(max_workers=5) as ex:
-                    futures = {ex.submit(_process, r, i): i for i, (_, r) in enumerate(df.iterrows())}
-                    results = [None] * len(df)
-                    for count, fut in enumerate(as_completed(futures)):
-                        i = futures[fut]
-                        results[i] = fut.result()
-                        bar.progress((count + 1) / len(df))
-                        status.text(f"Processed {count + 1}/{len(df)}")
+
+                def _on_progress(done, total):
+                    bar.progress(done / total)
+                    status.text(f"Processed {done}/{total}")
+
+                rows = to_records(df)
+                stages = ["website", "location"] + (["employees"] if find_employees else [])
+                pipeline = EnrichmentPipeline(stages)
+                results, error_log = enrich_rows(rows, on_progress=_on_progress, pipeline=pipeline)
+                st.session_state.enrich_timings = pipeline.timings()
 
                 augmented_df = pd.DataFrame(results)
                 ranked = augmented_df.copy()
-                ranked["Rank"] = ranked.apply(lambda r: compute_score(r, st.session_state.ranking_config), axis=1)
+                ranked["Rank"] = compute_scores(ranked, st.session_state.ranking_config)
                 ranked = ranked.sort_values("Rank", ascending=False)
 
                 st.session_state.augmented_df = augmented_df
                 st.session_state.ranked_df = ranked
+                st.session_state.ranked_key = frame_hash(ranked)
                 st.session_state.show_results = True
                 status.success("✅ Augmentation complete.")
                 st.caption(f"⏱️ Time: {int(time.time() - start)}s")
@@ -128,17 +119,17 @@ def run_scrape_and_rank_tab():
     if st.session_state.get("show_results") and st.session_state.get("ranked_df") is not None:
         st.markdown("### 🏆 Ranked Companies")
         st.dataframe(st.session_state.ranked_df)
+        if st.session_state.get("enrich_timings"):
+            with st.expander("⏱️ Time spent per enrichment stage"):
+                st.dataframe(pd.DataFrame(st.session_state.enrich_timings).T)
 
         st.markdown("### 💾 Export")
         st.markdown("The exported file does not include the 'Ranking' column so that you can easily re-import back to Zoho, since Zoho fields currently lack a ranking column")
 
-        export_df = st.session_state.ranked_df.drop(columns=[c for c in ["Rank", "Error"] if c in st.session_state.ranked_df.columns])
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-            export_df.to_excel(writer, index=False)
-        st.download_button(
-            "⬇️ Download", 
-            buffer.getvalue(), 
-            "ranked_companies.xlsx",
-            key="download_button"
+        ranked_df = st.session_state.ranked_df
+        show_export(
+            lambda: ranked_df,
+            data_key=st.session_state.ranked_key,
+            file_stem="ranked_companies",
+            key_prefix="scrape",
         )
\ No newline at end of file
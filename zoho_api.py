@@ -1,20 +1,498 @@
+import io
+import json
+import os
+import math
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator
+
+import pandas as pd
 import requests
 import streamlit as st
+from sqlalchemy import Column, MetaData, String, Table, Text, create_engine, delete, event, select
+from sqlalchemy.dialects.sqlite import insert
+
+from scraper.rate_limiter import HostRateLimiter
+
+ZOHO_ACCOUNTS_URL = "https://accounts.zoho.com"
+ZOHO_API_URL = "https://www.zohoapis.com"
+ZOHO_API_VERSION = "v2.1"       # first version with page_token paging past 2,000 records
+ZOHO_BULK_VERSION = "v2"
+ZOHO_PAGE_SIZE = 200
+ZOHO_STORE_PATH = os.getenv("ZOHO_STORE_PATH", os.path.join(".cache", "zoho.sqlite"))
+TOKEN_EXPIRY_MARGIN = 60        # refresh this many seconds before Zoho says the token expires
+BULK_POLL_INTERVAL = 5
+BULK_TIMEOUT = 30 * 60
+
+# Write-back (see write_back)
+ZOHO_UPSERT_BATCH = 100         # Zoho's per-call maximum
+ZOHO_WRITE_WORKERS = 4          # upsert calls in flight; Zoho caps concurrent calls per org
+ZOHO_WRITE_RATE = {"rate": 2.0, "burst": 4, "min_rate": 0.2, "max_rate": 5.0}
+ZOHO_WRITE_RETRIES = 3          # extra rounds for records that failed transiently
+# Ranking column -> Zoho field API name. Zoho has no ranking field; create a custom one to match.
+ZOHO_WRITE_BACK_FIELDS = {"Rank": "Ranking_Score", "Website": "Website", "Region": "Region"}
+RETRYABLE_CODES = {"INTERNAL_ERROR", "LIMIT_EXCEEDED", "TOO_MANY_REQUESTS"}
+
+
+def _with_sync_fields(fields: list[str]) -> list[str]:
+    """The store keys on id and tracks Modified_Time, so those are always requested."""
+    return list(dict.fromkeys(["id", "Modified_Time", *fields]))
+
+
+class ZohoError(RuntimeError):
+    def __init__(self, message: str, status: int | None = None, payload=None, retry_after: str | None = None):
+        super().__init__(message)
+        self.status = status
+        self.payload = payload
+        self.retry_after = retry_after
+
+
+class ZohoClient:
+    """
+    Zoho CRM REST client. The OAuth access token is cached until shortly before it
+    expires (and refreshed once on a 401), record reads follow page_token paging,
+    and large modules can be pulled as one CSV through the bulk read API.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        refresh_token: str,
+        accounts_url: str = ZOHO_ACCOUNTS_URL,
+        api_url: str = ZOHO_API_URL,
+        session: requests.Session | None = None,
+        timeout: float = 30,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_token = refresh_token
+        self.accounts_url = accounts_url.rstrip("/")
+        self.api_url = api_url.rstrip("/")
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self._token = None
+        self._token_expires = 0.0
+        self._token_lock = threading.Lock()
+
+    # --- auth ---------------------------------------------------------------
+
+    def access_token(self, force_refresh: bool = False) -> str:
+        with self._token_lock:
+            if force_refresh or not self._token or time.time() >= self._token_expires:
+                res = self.session.post(f"{self.accounts_url}/oauth/v2/token", params={
+                    "refresh_token": self.refresh_token,
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "grant_type": "refresh_token",
+                }, timeout=self.timeout)
+                body = res.json()
+                if "access_token" not in body:
+                    raise ZohoError(f"Token refresh failed: {body.get('error', res.text)}", res.status_code, body)
+                self._token = body["access_token"]
+                self._token_expires = time.time() + int(body.get("expires_in", 3600)) - TOKEN_EXPIRY_MARGIN
+                # Zoho tells us which data centre the org lives in
+                if body.get("api_domain"):
+                    self.api_url = body["api_domain"].rstrip("/")
+            return self._token
+
+    def request(self, method: str, path: str, headers: dict | None = None, **kwargs) -> requests.Response:
+        url = path if path.startswith("http") else f"{self.api_url}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(2):
+            auth = {"Authorization": f"Zoho-oauthtoken {self.access_token(force_refresh=attempt > 0)}"}
+            res = self.session.request(method, url, headers={**auth, **(headers or {})}, **kwargs)
+            if res.status_code != 401:
+                break
+        if res.status_code >= 400:
+            try:
+                payload = res.json()
+            except ValueError:
+                payload = res.text
+            raise ZohoError(f"{method} {path} returned {res.status_code}", res.status_code, payload,
+                            res.headers.get("Retry-After"))
+        return res
+
+    # --- records API --------------------------------------------------------
+
+    def iter_pages(
+        self,
+        module: str,
+        fields: list[str] | None = None,
+        modified_since: str | None = None,
+        per_page: int = ZOHO_PAGE_SIZE,
+    ) -> Iterator[list[dict]]:
+        """Yield each page of a module's records, oldest modification first."""
+        params = {"per_page": per_page, "sort_by": "Modified_Time", "sort_order": "asc"}
+        if fields:
+            params["fields"] = ",".join(_with_sync_fields(fields))
+        headers = {"If-Modified-Since": modified_since} if modified_since else None
+        page = 1
+        while True:
+            res = self.request("GET", f"/crm/{ZOHO_API_VERSION}/{module}", headers=headers, params=params)
+            # 204: no records at all; 304: nothing modified since the given time
+            if res.status_code in (204, 304):
+                return
+            body = res.json()
+            yield body.get("data", [])
+            info = body.get("info", {})
+            if not info.get("more_records"):
+                return
+            # page_token is required past the first 2,000 records; plain page numbers work before that
+            params.pop("page", None)
+            params.pop("page_token", None)
+            if info.get("next_page_token"):
+                params["page_token"] = info["next_page_token"]
+            else:
+                page += 1
+                params["page"] = page
+
+    def fetch_all(self, module: str, fields: list[str] | None = None, modified_since: str | None = None) -> list[dict]:
+        return [rec for page in self.iter_pages(module, fields, modified_since) for rec in page]
+
+    def deleted_ids(self, module: str, since: str | None = None) -> list[str]:
+        """Ids of records deleted (recycle bin or permanently) since the given time."""
+        ids, page = [], 1
+        headers = {"If-Modified-Since": since} if since else None
+        while True:
+            res = self.request("GET", f"/crm/{ZOHO_API_VERSION}/{module}/deleted", headers=headers,
+                               params={"type": "all", "page": page, "per_page": ZOHO_PAGE_SIZE})
+            if res.status_code in (204, 304):
+                return ids
+            body = res.json()
+            ids += [str(rec["id"]) for rec in body.get("data", [])]
+            if not body.get("info", {}).get("more_records"):
+                return ids
+            page += 1
+
+    def upsert(self, module: str, records: list[dict], duplicate_check_fields: list[str] | None = None) -> list[dict]:
+        """
+        Insert-or-update up to ZOHO_UPSERT_BATCH records in one call. Returns Zoho's
+        per-record results, in input order; a call where every record failed comes
+        back as 400 with the same per-record body, so that is returned too.
+        """
+        body = {"data": records, "trigger": []}
+        if duplicate_check_fields:
+            body["duplicate_check_fields"] = duplicate_check_fields
+        try:
+            return self.request("POST", f"/crm/{ZOHO_API_VERSION}/{module}/upsert", json=body).json()["data"]
+        except ZohoError as e:
+            if e.status == 400 and isinstance(e.payload, dict) and len(e.payload.get("data") or []) == len(records):
+                return e.payload["data"]
+            raise
+
+    # --- bulk read API ------------------------------------------------------
+
+    def bulk_read(
+        self,
+        module: str,
+        fields: list[str] | None = None,
+        criteria: dict | None = None,
+        poll_interval: float = BULK_POLL_INTERVAL,
+        timeout: float = BULK_TIMEOUT,
+    ) -> pd.DataFrame:
+        """
+        Export a whole module through bulk read jobs (up to 200,000 records per job
+        page), polling each job until its zipped CSV is ready.
+        """
+        frames, page = [], 1
+        while True:
+            query = {"module": module, "page": page}
+            if fields:
+                # Bulk CSVs always carry the record id (as "Id")
+                query["fields"] = [f for f in _with_sync_fields(fields) if f != "id"]
+            if criteria:
+                query["criteria"] = criteria
+            res = self.request("POST", f"/crm/bulk/{ZOHO_BULK_VERSION}/read", json={"query": query})
+            job_id = res.json()["data"][0]["details"]["id"]
+
+            result = self._wait_for_bulk_job(job_id, poll_interval, timeout)
+            download = self.request("GET", result.get("download_url") or f"/crm/bulk/{ZOHO_BULK_VERSION}/read/{job_id}/result")
+            with zipfile.ZipFile(io.BytesIO(download.content)) as zf:
+                with zf.open(zf.namelist()[0]) as f:
+                    frames.append(pd.read_csv(f, dtype=str, keep_default_na=False))
+            if not result.get("more_records"):
+                break
+            page += 1
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _wait_for_bulk_job(self, job_id: str, poll_interval: float, timeout: float) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.request("GET", f"/crm/bulk/{ZOHO_BULK_VERSION}/read/{job_id}").json()["data"][0]
+            if job["state"] == "COMPLETED":
+                return job.get("result", {})
+            if job["state"] == "FAILED":
+                raise ZohoError(f"Bulk read job {job_id} failed", payload=job)
+            if time.monotonic() > deadline:
+                raise ZohoError(f"Bulk read job {job_id} still {job['state']} after {timeout}s", payload=job)
+            time.sleep(poll_interval)
+
+
+# --- local store for incremental sync ---------------------------------------
+
+metadata = MetaData()
+zoho_records = Table(
+    "zoho_records", metadata,
+    Column("module", String(64), primary_key=True),
+    Column("id", String(32), primary_key=True),
+    Column("modified_time", String(40), nullable=False, index=True),
+    Column("data", Text, nullable=False),
+)
+zoho_sync_state = Table(
+    "zoho_sync_state", metadata,
+    Column("module", String(64), primary_key=True),
+    Column("last_modified", String(40), nullable=False),
+)
+
+
+def _modified_key(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+class ZohoStore:
+    """SQLite copy of CRM modules; remembers the newest Modified_Time seen per module."""
+
+    def __init__(self, path: str = ZOHO_STORE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+
+        @event.listens_for(self.engine, "connect")
+        def _set_pragmas(dbapi_conn, _):
+            cur = dbapi_conn.cursor()
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.close()
+
+        metadata.create_all(self.engine)
+
+    def last_modified(self, module: str) -> str | None:
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(zoho_sync_state.c.last_modified).where(zoho_sync_state.c.module == module)
+            ).scalar()
+
+    def upsert(self, module: str, records: list[dict]):
+        if not records:
+            return
+        rows = [{"module": module, "id": str(r["id"]), "modified_time": r.get("Modified_Time") or "",
+                 "data": json.dumps(r)} for r in records]
+        stmt = insert(zoho_records)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["module", "id"],
+            set_={"modified_time": stmt.excluded.modified_time, "data": stmt.excluded.data},
+        )
+        newest = max((r["modified_time"] for r in rows if r["modified_time"]), key=_modified_key, default=None)
+        previous = self.last_modified(module)
+        with self.engine.begin() as conn:
+            conn.execute(stmt, rows)
+            if newest and (previous is None or _modified_key(newest) > _modified_key(previous)):
+                state = insert(zoho_sync_state).values(module=module, last_modified=newest)
+                conn.execute(state.on_conflict_do_update(index_elements=["module"], set_={"last_modified": newest}))
+
+    def delete(self, module: str, ids: list[str]):
+        if ids:
+            with self.engine.begin() as conn:
+                conn.execute(delete(zoho_records).where(
+                    (zoho_records.c.module == module) & zoho_records.c.id.in_(ids)))
+
+    def records(self, module: str) -> list[dict]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(zoho_records.c.data).where(zoho_records.c.module == module))
+            return [json.loads(r.data) for r in rows]
+
+    def records_by_id(self, module: str, ids: list[str]) -> dict[str, dict]:
+        out = {}
+        with self.engine.connect() as conn:
+            for i in range(0, len(ids), 500):
+                rows = conn.execute(select(zoho_records.c.id, zoho_records.c.data).where(
+                    (zoho_records.c.module == module) & zoho_records.c.id.in_(ids[i:i + 500])))
+                out.update({r.id: json.loads(r.data) for r in rows})
+        return out
+
+    def merge_fields(self, module: str, updates: list[dict]):
+        """Apply written field values to stored records, so the next write-back diffs against them."""
+        existing = self.records_by_id(module, [str(u["id"]) for u in updates])
+        merged = [{**existing[str(u["id"])], **u} for u in updates if str(u["id"]) in existing]
+        with self.engine.begin() as conn:
+            for rec in merged:
+                conn.execute(zoho_records.update().where(
+                    (zoho_records.c.module == module) & (zoho_records.c.id == str(rec["id"]))
+                ).values(data=json.dumps(rec)))
+
+
+def sync_module(
+    client: ZohoClient, store: ZohoStore, module: str, fields: list[str] | None = None, bulk: bool = False,
+) -> dict:
+    """
+    Bring the store's copy of a module up to date: only records modified since the
+    last sync are fetched (If-Modified-Since), and deleted records are dropped.
+    With bulk=True the first sync of a module goes through the bulk read API.
+    """
+    since = store.last_modified(module)
+    fetched = 0
+    if bulk and since is None:
+        records = bulk_frame_to_records(client.bulk_read(module, fields))
+        store.upsert(module, records)
+        return {"module": module, "since": None, "fetched": len(records), "deleted": 0}
+    for page in client.iter_pages(module, fields, modified_since=since):
+        store.upsert(module, page)
+        fetched += len(page)
+    deleted = client.deleted_ids(module, since) if since else []
+    store.delete(module, deleted)
+    return {"module": module, "since": since, "fetched": fetched, "deleted": len(deleted)}
+
+
+def _plain(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA:
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def _same(old, new) -> bool:
+    old, new = _plain(old), _plain(new)
+    if isinstance(old, dict):
+        old = old.get("name")
+    if old in (None, "") or new in (None, ""):
+        return old in (None, "") and new in (None, "")
+    try:
+        return math.isclose(float(old), float(new), rel_tol=1e-9)
+    except (TypeError, ValueError):
+        return str(old).strip() == str(new).strip()
+
+
+def _record_id(row: dict) -> str | None:
+    rid = _plain(row.get("id")) or _plain(row.get("Record Id"))
+    return str(rid).removeprefix("zcrm_") if rid else None
+
+
+def write_back(
+    client: ZohoClient,
+    module: str,
+    rows: list[dict],
+    store: ZohoStore | None = None,
+    field_map: dict[str, str] = ZOHO_WRITE_BACK_FIELDS,
+    duplicate_check_fields: list[str] | None = None,
+    batch_size: int = ZOHO_UPSERT_BATCH,
+    max_workers: int = ZOHO_WRITE_WORKERS,
+    retries: int = ZOHO_WRITE_RETRIES,
+    limiter: HostRateLimiter | None = None,
+) -> dict:
+    """
+    Push ranked/enriched rows back to Zoho through batched upserts.
+
+    Rows are matched to CRM records by id ("id", or "Record Id" from an export) or
+    else by duplicate_check_fields; with a store, rows whose mapped fields equal the
+    last synced values are skipped. Batches run concurrently under a shared rate
+    limit. Records that fail transiently (throttling, server errors, retryable
+    per-record codes) are re-sent in later rounds; validation errors are reported.
+    """
+    limiter = limiter or HostRateLimiter("zoho", **ZOHO_WRITE_RATE)
+    report = {"changed": 0, "unchanged": 0, "skipped": 0, "written": 0, "calls": 0, "failed": []}
+
+    previous = store.records_by_id(module, [i for i in map(_record_id, rows) if i]) if store else {}
+    pending = []
+    for row in rows:
+        payload = {api: _plain(row[col]) for col, api in field_map.items() if col in row}
+        rid = _record_id(row)
+        if rid:
+            old = previous.get(rid)
+            if old is not None and all(_same(old.get(api), v) for api, v in payload.items()):
+                report["unchanged"] += 1
+                continue
+            payload["id"] = rid
+        elif duplicate_check_fields:
+            payload.update({f: _plain(row.get(f.replace("_", " "), row.get(f))) for f in duplicate_check_fields})
+        else:
+            report["skipped"] += 1
+            continue
+        pending.append(payload)
+    report["changed"] = len(pending)
+
+    def _send(batch):
+        limiter.acquire()
+        try:
+            results = client.upsert(module, batch, duplicate_check_fields)
+        except ZohoError as e:
+            limiter.record(e.status or 500, e.retry_after)
+            retryable = e.status is None or e.status == 429 or e.status >= 500
+            code = "TOO_MANY_REQUESTS" if e.status == 429 else f"HTTP_{e.status}"
+            return [{"status": "error", "code": code if retryable else "REQUEST_REJECTED", "message": str(e),
+                     "retryable": retryable}] * len(batch)
+        except requests.RequestException as e:
+            return [{"status": "error", "code": "NETWORK_ERROR", "message": str(e), "retryable": True}] * len(batch)
+        limiter.record(200)
+        return results
+
+    written = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for attempt in range(retries + 1):
+            batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            report["calls"] += len(batches)
+            retry = []
+            for batch, results in zip(batches, pool.map(_send, batches)):
+                for payload, result in zip(batch, results):
+                    if result.get("status") == "success":
+                        written.append({**payload, "id": str(result.get("details", {}).get("id", payload.get("id")))})
+                    elif (result.get("retryable") or result.get("code") in RETRYABLE_CODES) and attempt < retries:
+                        retry.append(payload)
+                    else:
+                        report["failed"].append({"id": payload.get("id"), "code": result.get("code"),
+                                                 "message": result.get("message"), "details": result.get("details")})
+            if not retry:
+                break
+            pending = retry
+
+    report["written"] = len(written)
+    if store:
+        store.merge_fields(module, written)
+    return report
+
+
+def records_to_frame(records: list[dict]) -> pd.DataFrame:
+    """
+    Records as the ranking code expects them: lookups like Owner/Parent_Account
+    reduced to their name and API names spelled like export headers ("Account Name").
+    """
+    flat = [{k: v.get("name") if isinstance(v, dict) else v for k, v in r.items() if not k.startswith("$")}
+            for r in records]
+    df = pd.DataFrame(flat)
+    df.columns = [c.replace("_", " ") for c in df.columns]
+    return df
+
+
+def bulk_frame_to_records(df: pd.DataFrame) -> list[dict]:
+    """Bulk read CSV rows in the same shape as records API rows, so they can seed a store."""
+    df = df.rename(columns={"Id": "id"})
+    return [{k: (v if v != "" else None) for k, v in row.items()} for row in df.to_dict("records")]
+
+
+@st.cache_resource
+def get_client() -> ZohoClient:
+    """Client built from st.secrets["zoho"]; accounts_url/api_url may point at another data centre."""
+    cfg = st.secrets["zoho"]
+    return ZohoClient(
+        cfg["client_id"], cfg["client_secret"], cfg["refresh_token"],
+        accounts_url=cfg.get("accounts_url", ZOHO_ACCOUNTS_URL),
+        api_url=cfg.get("api_url", ZOHO_API_URL),
+    )
+
 
 def get_access_token():
-    url = "https://accounts.zoho.com/oauth/v2/token"
-    params = {
-        "refresh_token": st.secrets["zoho"]["refresh_token"],
-        "client_id": st.secrets["zoho"]["client_id"],
-        "client_secret": st.secrets["zoho"]["client_secret"],
-        "grant_type": "refresh_token"
-    }
-    res = requests.post(url, params=params)
-    return res.json().get("access_token")
+    return get_client().access_token()
+
 
 def fetch_leads():
-    token = get_access_token()
-    headers = {"Authorization": f"Zoho-oauthtoken {token}"}
-    res = requests.get("https://www.zohoapis.com/crm/v2/Leads", headers=headers)
-    leads = res.json().get("data", [])
-    return pd.DataFrame(leads)
+    return records_to_frame(get_client().fetch_all("Leads"))
+
+
+def load_module(
+    module: str, fields: list[str] | None = None, store: ZohoStore | None = None, bulk: bool = False,
+) -> pd.DataFrame:
+    """Incrementally sync a module into the local store and return it ready for ranking."""
+    store = store or ZohoStore()
+    sync_module(get_client(), store, module, fields, bulk=bulk)
+    return records_to_frame(store.records(module))
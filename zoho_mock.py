@@ -0,0 +1,375 @@
+"""
+Local stand-in for the parts of Zoho CRM that zoho_api uses: the OAuth token
+endpoint, paged record reads (page_token, If-Modified-Since), deleted records,
+bulk read jobs and batched upserts. Records live in memory.
+
+    python zoho_mock.py --records 5000 [--port 8765]
+
+then point the client at it, e.g. in .streamlit/secrets.toml:
+
+    [zoho]
+    client_id = "mock"
+    client_secret = "mock"
+    refresh_token = "mock"
+    accounts_url = "http://127.0.0.1:8765"
+    api_url = "http://127.0.0.1:8765"
+
+In code, `with MockZoho() as mock:` serves on a free port and exposes `mock.url`,
+`mock.client()` and request counters for checking what a sync actually did.
+"""
+import argparse
+import base64
+import csv
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zipfile
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from zoho_api import ZOHO_API_VERSION, ZOHO_BULK_VERSION, ZohoClient
+
+REGIONS = ["North America", "EU", "APAC", "LATAM"]
+FUNDING = ["Seed", "Series A", "Series B", "Series C", "Public"]
+SEGMENTS = ["Cell Therapy", "Gene Therapy", "Biologics", "Small Molecule"]
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _iso(dt):
+    return dt.isoformat()
+
+
+class MockZoho:
+    def __init__(self, host="127.0.0.1", port=0, token_expires_in=3600, bulk_page_size=200_000,
+                 bulk_polls_until_done=1, max_concurrent_writes=None, invalid_ids=(), flaky_rate=0.0, seed=0):
+        self.modules = {}           # module -> {id: record}
+        self.deleted = {}           # module -> [(id, deleted_time)]
+        self.tokens = {}            # access token -> expiry
+        self.jobs = {}
+        self.token_expires_in = token_expires_in
+        self.bulk_page_size = bulk_page_size
+        self.bulk_polls_until_done = bulk_polls_until_done
+        self.counts = Counter()
+        # Write-side failure modes: too many concurrent upserts get a 429, records in
+        # invalid_ids always fail validation, and flaky_rate of the rest fail transiently
+        self.max_concurrent_writes = max_concurrent_writes
+        self.invalid_ids = set(invalid_ids)
+        self.flaky_rate = flaky_rate
+        self.upsert_batches = []
+        self._writes_in_flight = 0
+        self._rng = random.Random(seed)
+        self.lock = threading.RLock()
+        self._clock = _now()
+        self._next_id = 4_000_000_000_000
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    # --- data helpers -------------------------------------------------------
+
+    def _tick(self):
+        # Strictly increasing Modified_Time, one second apart, like a busy org
+        self._clock = max(self._clock + timedelta(seconds=1), _now())
+        return _iso(self._clock)
+
+    def add_records(self, module, records):
+        with self.lock:
+            store = self.modules.setdefault(module, {})
+            out = []
+            for rec in records:
+                rec = dict(rec)
+                if "id" not in rec:
+                    rec["id"] = str(self._next_id)
+                    self._next_id += 1
+                rec["Modified_Time"] = self._tick()
+                store[rec["id"]] = rec
+                out.append(rec)
+            return out
+
+    def update_record(self, module, record_id, **changes):
+        with self.lock:
+            rec = self.modules[module][record_id]
+            rec.update(changes)
+            rec["Modified_Time"] = self._tick()
+            return rec
+
+    def delete_record(self, module, record_id):
+        with self.lock:
+            self.modules[module].pop(record_id)
+            self.deleted.setdefault(module, []).append((record_id, self._tick()))
+
+    def seed_accounts(self, n, seed=0):
+        rng = random.Random(seed)
+        return self.add_records("Accounts", [{
+            "Account_Name": f"Mock Bio {i}",
+            "Website": rng.choice([None, f"mockbio{i}.com"]),
+            "Region": rng.choice(REGIONS + [None]),
+            "Employees": rng.choice([None, rng.randint(5, 5000)]),
+            "Funding_Stage": rng.choice(FUNDING),
+            "Major_Segment": rng.choice(SEGMENTS),
+            "Owner": {"name": "Mock Owner", "id": "1"},
+        } for i in range(n)])
+
+    def client(self, **kwargs):
+        return ZohoClient("mock", "mock", "mock", accounts_url=self.url, api_url=self.url, **kwargs)
+
+    # --- server lifecycle ---------------------------------------------------
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- request handling ---------------------------------------------------
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=None, content_type="application/json"):
+                data = b"" if body is None else body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _authorized(self):
+                token = (self.headers.get("Authorization") or "").removeprefix("Zoho-oauthtoken ")
+                with mock.lock:
+                    expiry = mock.tokens.get(token)
+                if expiry is None or expiry < _now():
+                    self._send(401, {"code": "INVALID_TOKEN", "message": "invalid oauth token", "status": "error"})
+                    return False
+                return True
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                mock.counts[("POST", _route(url.path))] += 1
+                body = self._body()   # always drain it, or a 401 leaves it on the keep-alive socket
+                if url.path == "/oauth/v2/token":
+                    token = uuid.uuid4().hex
+                    with mock.lock:
+                        mock.tokens[token] = _now() + timedelta(seconds=mock.token_expires_in)
+                    return self._send(200, {"access_token": token, "expires_in": mock.token_expires_in,
+                                            "api_domain": mock.url, "token_type": "Bearer"})
+                if not self._authorized():
+                    return
+                if url.path == f"/crm/bulk/{ZOHO_BULK_VERSION}/read":
+                    return self._send(201, mock._create_bulk_job(body["query"]))
+                parts = url.path.strip("/").split("/")
+                if parts[:2] == ["crm", ZOHO_API_VERSION] and parts[3:] == ["upsert"]:
+                    status, payload = mock._upsert(parts[2], body)
+                    if status == 429:
+                        self.send_response(429)
+                        self.send_header("Retry-After", "1")
+                        self.send_header("Content-Type", "application/json")
+                        data = json.dumps(payload).encode()
+                        self.send_header("Content-Length", str(len(data)))
+                        self.end_headers()
+                        return self.wfile.write(data)
+                    return self._send(status, payload)
+                self._send(404, {"code": "INVALID_URL_PATTERN"})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                mock.counts[("GET", _route(url.path))] += 1
+                if not self._authorized():
+                    return
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                since = self.headers.get("If-Modified-Since")
+                parts = url.path.strip("/").split("/")
+                if parts[:2] == ["crm", ZOHO_API_VERSION] and len(parts) == 3:
+                    return self._send(*mock._list_records(parts[2], params, since))
+                if parts[:2] == ["crm", ZOHO_API_VERSION] and parts[3:] == ["deleted"]:
+                    return self._send(*mock._list_deleted(parts[2], params, since))
+                if parts[:3] == ["crm", "bulk", ZOHO_BULK_VERSION] and parts[3:4] == ["read"]:
+                    if parts[5:] == ["result"]:
+                        return self._send(200, mock._bulk_result(parts[4]), "application/zip")
+                    return self._send(200, mock._bulk_status(parts[4]))
+                self._send(404, {"code": "INVALID_URL_PATTERN"})
+
+        return Handler
+
+    def _modified_after(self, records, since):
+        if not since:
+            return records
+        cutoff = datetime.fromisoformat(since)
+        return [r for r in records if datetime.fromisoformat(r["Modified_Time"]) > cutoff]
+
+    def _list_records(self, module, params, since):
+        with self.lock:
+            records = sorted(self.modules.get(module, {}).values(), key=lambda r: r["Modified_Time"])
+        if not records:
+            return 204, None
+        records = self._modified_after(records, since)
+        if not records:
+            return 304, None
+        per_page = min(int(params.get("per_page", 200)), 200)
+        if "page_token" in params:
+            offset = json.loads(base64.urlsafe_b64decode(params["page_token"]))["offset"]
+        else:
+            page = int(params.get("page", 1))
+            if page * per_page > 2000:
+                return 400, {"code": "DISCRETE_PAGINATION_LIMIT_EXCEEDED", "status": "error",
+                             "message": "use page_token to fetch records beyond 2000"}
+            offset = (page - 1) * per_page
+        chunk = records[offset:offset + per_page]
+        if "fields" in params:
+            keep = set(params["fields"].split(","))
+            chunk = [{k: v for k, v in r.items() if k in keep} for r in chunk]
+        more = offset + per_page < len(records)
+        info = {"per_page": per_page, "count": len(chunk), "more_records": more}
+        if more:
+            info["next_page_token"] = base64.urlsafe_b64encode(
+                json.dumps({"offset": offset + per_page}).encode()).decode()
+        return 200, {"data": chunk, "info": info}
+
+    def _list_deleted(self, module, params, since):
+        with self.lock:
+            gone = list(self.deleted.get(module, []))
+        if since:
+            cutoff = datetime.fromisoformat(since)
+            gone = [(i, t) for i, t in gone if datetime.fromisoformat(t) > cutoff]
+        if not gone:
+            return 204, None
+        per_page = int(params.get("per_page", 200))
+        page = int(params.get("page", 1))
+        chunk = gone[(page - 1) * per_page:page * per_page]
+        data = [{"id": i, "deleted_time": t, "type": "recycle"} for i, t in chunk]
+        return 200, {"data": data, "info": {"page": page, "count": len(data), "more_records": page * per_page < len(gone)}}
+
+    def _upsert(self, module, body):
+        records = body.get("data") or []
+        if len(records) > 100:
+            return 400, {"code": "LIMIT_EXCEEDED", "status": "error", "message": "max 100 records per call"}
+        with self.lock:
+            if self.max_concurrent_writes and self._writes_in_flight >= self.max_concurrent_writes:
+                return 429, {"code": "TOO_MANY_REQUESTS", "status": "error", "message": "concurrency limit"}
+            self._writes_in_flight += 1
+            self.upsert_batches.append(len(records))
+        try:
+            time.sleep(0.02)   # keep calls in flight long enough to overlap
+            results = [self._upsert_one(module, rec, body.get("duplicate_check_fields") or []) for rec in records]
+        finally:
+            with self.lock:
+                self._writes_in_flight -= 1
+        ok = any(r["status"] == "success" for r in results)
+        return (200 if ok else 400), {"data": results}
+
+    def _upsert_one(self, module, rec, duplicate_check_fields):
+        with self.lock:
+            store = self.modules.setdefault(module, {})
+            target = store.get(str(rec.get("id"))) if rec.get("id") else None
+            if target is None and duplicate_check_fields:
+                target = next((r for r in store.values()
+                               if all(r.get(f) == rec.get(f) for f in duplicate_check_fields)), None)
+            if target is not None and target["id"] in self.invalid_ids:
+                return {"code": "INVALID_DATA", "status": "error", "message": "invalid data",
+                        "details": {"api_name": "Website", "id": target["id"]}}
+            if self._rng.random() < self.flaky_rate:
+                return {"code": "INTERNAL_ERROR", "status": "error", "message": "internal error", "details": {}}
+            fields = {k: v for k, v in rec.items() if k != "id"}
+            if target is None:
+                target = self.add_records(module, [fields])[0]
+                action = "insert"
+            else:
+                self.update_record(module, target["id"], **fields)
+                action = "update"
+            return {"code": "SUCCESS", "status": "success", "action": action, "message": "record added" if action == "insert" else "record updated",
+                    "details": {"id": target["id"], "Modified_Time": target["Modified_Time"]}}
+
+    def _create_bulk_job(self, query):
+        job_id = uuid.uuid4().hex[:12]
+        with self.lock:
+            records = sorted(self.modules.get(query["module"], {}).values(), key=lambda r: r["Modified_Time"])
+            page = int(query.get("page", 1))
+            chunk = records[(page - 1) * self.bulk_page_size:page * self.bulk_page_size]
+            self.jobs[job_id] = {
+                "query": query, "polls": 0, "records": chunk,
+                "more_records": page * self.bulk_page_size < len(records),
+            }
+        return {"data": [{"status": "success", "code": "ADDED", "details": {"id": job_id}}]}
+
+    def _bulk_status(self, job_id):
+        with self.lock:
+            job = self.jobs[job_id]
+            job["polls"] += 1
+            done = job["polls"] > self.bulk_polls_until_done
+        state = {"id": job_id, "state": "COMPLETED" if done else "IN PROGRESS", "query": job["query"]}
+        if done:
+            state["result"] = {
+                "page": job["query"].get("page", 1),
+                "count": len(job["records"]),
+                "download_url": f"/crm/bulk/{ZOHO_BULK_VERSION}/read/{job_id}/result",
+                "more_records": job["more_records"],
+            }
+        return {"data": [state]}
+
+    def _bulk_result(self, job_id):
+        job = self.jobs[job_id]
+        fields = job["query"].get("fields") or sorted({k for r in job["records"] for k in r if k != "id"})
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(["Id", *fields])
+        for r in job["records"]:
+            # Lookups come back as the related record's id in bulk CSVs
+            writer.writerow([r["id"], *[(r.get(f) or {}).get("id") if isinstance(r.get(f), dict)
+                                        else "" if r.get(f) is None else r.get(f) for f in fields]])
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(f"{job_id}.csv", out.getvalue())
+        return buf.getvalue()
+
+
+def _route(path):
+    """Path with record/job ids collapsed, for request counters."""
+    return re.sub(r"/(read)/[0-9a-f]+", r"/\1/{id}", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Zoho CRM org for local testing.")
+    parser.add_argument("--records", type=int, default=1000, help="Accounts to seed")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token-expires-in", type=int, default=3600)
+    args = parser.parse_args()
+
+    mock = MockZoho(port=args.port, token_expires_in=args.token_expires_in)
+    mock.seed_accounts(args.records)
+    print(f"Mock Zoho serving {args.records} Accounts at {mock.url} (Ctrl+C to stop)")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        mock.server.server_close()
+
+
+if __name__ == "__main__":
+    main()